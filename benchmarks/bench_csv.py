@@ -0,0 +1,98 @@
+"""
+Export CSV : DictWriter (lignes dict) et writerow ligne par ligne (avant)
+vs writerows par lots à grand tampon (après), puis sorties gzip et Parquet
+(si pyarrow est installé), sur des lignes REMIT.
+
+    python benchmarks/bench_csv.py --rows 1000000
+"""
+import argparse
+import csv
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config.reports import get_report  # noqa: E402
+from export.csv_exporter import generate_csv_stream  # noqa: E402
+from fakes import ND, fake_rows  # noqa: E402
+
+
+def _legacy_dict(rows, schema, path: Path):
+    """Ancien chemin dictionnaire : csv.DictWriter, une ligne à la fois."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=schema.columns, delimiter=";")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+def _legacy_tuple(rows, schema, path: Path):
+    """Ancien chemin tuples : csv.writer, writerow ligne par ligne."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(schema.columns)
+        for row in rows:
+            writer.writerow(row)
+
+
+def measure(label: str, write, rows: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        path = write(Path(tmp))
+        elapsed = time.perf_counter() - t0
+        size = path.stat().st_size
+
+    print(
+        f"{label:<11} | lignes={rows:>9} | {elapsed:7.2f}s "
+        f"| {rows / elapsed:>9.0f} lignes/s | {size / 1024 / 1024:8.1f} Mo"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    schema = get_report("remit").schema
+    date_debut = datetime(2026, 1, 1)
+    date_fin = date_debut + timedelta(days=31) - timedelta(seconds=1)
+    rows = list(islice(
+        fake_rows("remit", ND, date_debut, date_fin, -(-args.rows // 31)), args.rows
+    ))
+    dicts = [schema.as_dict(row) for row in rows]
+
+    def legacy(writer, data):
+        def write(tmp: Path) -> Path:
+            path = tmp / "bench.csv"
+            writer(data, schema, path)
+            return path
+        return write
+
+    def current(output_format):
+        def write(tmp: Path) -> Path:
+            path, _ = generate_csv_stream(
+                iter(rows), "bench", "remit", output_base_dir=str(tmp),
+                schema=schema, output_format=output_format,
+            )
+            return path
+        return write
+
+    measure("DictWriter", legacy(_legacy_dict, dicts), args.rows)
+    measure("writerow", legacy(_legacy_tuple, rows), args.rows)
+    measure("csv", current("csv"), args.rows)
+    measure("gzip", current("gzip"), args.rows)
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("parquet     | pyarrow non installé, ignoré")
+    else:
+        measure("parquet", current("parquet"), args.rows)
+
+
+if __name__ == "__main__":
+    main()
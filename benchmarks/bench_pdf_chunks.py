@@ -0,0 +1,121 @@
+"""
+PDF d'une très grosse journée : table découpée en fenêtres de lignes
+(PDF_TABLE_CHUNK_ROWS) vs table unique (ancien rendu standard), en temps,
+pages par seconde et pic RSS. Chaque rendu tourne dans son propre processus.
+
+    python benchmarks/bench_pdf_chunks.py --rows 10000 50000 200000
+    python benchmarks/bench_pdf_chunks.py --rows 10000 --chunk-rows 32 64 128 --single-table
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config.reports import get_report  # noqa: E402
+from export import pdf_exporter  # noqa: E402
+from fakes import ND, fake_rows  # noqa: E402
+from reportlab.platypus import Table  # noqa: E402
+
+REPORT_TYPE = "remit"
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss : Ko sous Linux, octets sous macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 1024 / 1024
+
+
+def _single_table(header, rows, make_row, col_widths, right_cols, chunk_rows, fast=False):
+    """Ancien rendu : toutes les cellules construites, une seule Table."""
+    table = Table([header] + [make_row(r) for r in rows], colWidths=col_widths, repeatRows=1)
+    table.setStyle(pdf_exporter._table_style(right_cols, fast=fast))
+    return table
+
+
+def run_child(args) -> dict:
+    schema = get_report(REPORT_TYPE).schema
+    day = datetime(2026, 1, 1)
+    rows = list(fake_rows(
+        REPORT_TYPE, ND, day, day + timedelta(days=1, seconds=-1), args.rows
+    ))
+    rss_rows = _peak_rss_mb()
+
+    if args.single_table:
+        pdf_exporter._ChunkedTable = _single_table
+
+    start = time.perf_counter()
+    data = pdf_exporter.render_pdf_for_day(
+        "2026-01-01", rows, REPORT_TYPE, ND, schema, fast_table=args.mode == "fast"
+    )
+    wall = time.perf_counter() - start
+
+    return {
+        "pages": data.count(b"/Type /Page\n"),
+        "wall_s": wall,
+        "rss_rows_mb": rss_rows,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def measure(args, rows: int, mode: str, chunk_rows: int | None):
+    cmd = [sys.executable, __file__, "--run", f"--rows={rows}", f"--mode={mode}"]
+    if chunk_rows is None:
+        cmd.append("--single-table")
+        label = "unique"
+    else:
+        label = f"fen. {chunk_rows}"
+
+    env = {**os.environ, "PDF_TABLE_CHUNK_ROWS": str(chunk_rows or 0)}
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr[-4000:])
+        raise SystemExit(f"Rendu en échec ({mode}, {rows} lignes, {label})")
+    r = json.loads(proc.stdout.splitlines()[-1])
+
+    print(
+        f"{mode:<8} | {label:<9} | lignes={rows:>7} | pages={r['pages']:>6} "
+        f"| {r['wall_s']:8.2f}s | {r['pages'] / r['wall_s']:6.1f} pages/s "
+        f"| RSS={r['peak_rss_mb']:7.1f} Mo (lignes {r['rss_rows_mb']:.1f} Mo)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 50_000, 200_000],
+                        help="Lignes de la journée")
+    parser.add_argument("--mode", nargs="+", default=["standard", "fast"],
+                        choices=("standard", "fast"))
+    parser.add_argument("--chunk-rows", type=int, nargs="+",
+                        default=[pdf_exporter.table_chunk_rows()],
+                        help="Tailles de fenêtre mesurées")
+    parser.add_argument("--single-table", action="store_true",
+                        help="Mesurer aussi la table unique (lent au-delà de 10 000 lignes)")
+    parser.add_argument("--run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_child(argparse.Namespace(
+            rows=args.rows[0], mode=args.mode[0], single_table=args.single_table,
+        ))))
+        return
+
+    for rows in args.rows:
+        for mode in args.mode:
+            variants = list(args.chunk_rows)
+            if args.single_table:
+                variants.append(None)
+            for chunk_rows in variants:
+                measure(args, rows, mode, chunk_rows)
+
+
+if __name__ == "__main__":
+    main()
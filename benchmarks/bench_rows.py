@@ -0,0 +1,80 @@
+"""
+Mémoire et temps : lignes dict (ancien format) vs tuples + schéma partagé.
+
+    python benchmarks/bench_rows.py --rows 1000000
+"""
+import argparse
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config.reports import get_report  # noqa: E402
+from export.csv_exporter import generate_csv  # noqa: E402
+from fakes import ND, fake_rows  # noqa: E402
+
+
+def synthetic_cursor_rows(n: int):
+    """Tuples tels que retournés par `cursor.fetchmany` (27 colonnes REMIT)."""
+    date_debut = datetime(2026, 1, 1)
+    date_fin = date_debut + timedelta(days=31) - timedelta(seconds=1)
+    return islice(fake_rows("remit", ND, date_debut, date_fin, -(-n // 31)), n)
+
+
+def measure(label: str, build, rows: int, write_csv):
+    # Mémoire mesurée dans une passe séparée : tracemalloc fausse les temps
+    gc.collect()
+    tracemalloc.start()
+    build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    gc.collect()
+    t0 = time.perf_counter()
+    data = build()
+    build_s = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        write_csv(data, tmp)
+        csv_s = time.perf_counter() - t0
+
+    print(
+        f"{label:<8} | lignes={rows:>9} | fetch={build_s:7.2f}s "
+        f"| pic mémoire={peak / 1024 / 1024:9.1f} Mo | csv={csv_s:7.2f}s"
+    )
+    del data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    schema = get_report("remit").schema
+    columns = list(schema.columns)
+
+    measure(
+        "dict",
+        lambda: [dict(zip(columns, r)) for r in synthetic_cursor_rows(args.rows)],
+        args.rows,
+        lambda data, tmp: generate_csv(data, "bench", "remit", output_base_dir=tmp),
+    )
+    measure(
+        "tuple",
+        lambda: list(synthetic_cursor_rows(args.rows)),
+        args.rows,
+        lambda data, tmp: generate_csv(
+            data, "bench", "remit", output_base_dir=tmp, schema=schema
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
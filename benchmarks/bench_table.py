@@ -0,0 +1,70 @@
+"""
+Rendu des tableaux PDF : Paragraph par cellule (standard) vs texte brut
+découpé en fenêtres (fast), en pages par seconde.
+
+    python benchmarks/bench_table.py --rows 5000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config.reports import DEFAULT_PDF_COLUMNS  # noqa: E402
+from db.schema import ReportSchema  # noqa: E402
+from export import pdf_exporter  # noqa: E402
+
+
+def make_rows(n: int):
+    schema = ReportSchema(DEFAULT_PDF_COLUMNS)
+    start = datetime(2026, 1, 1)
+    rows = [
+        (
+            start + timedelta(seconds=i * 10), f"TX{i:012d}", "0341234567",
+            "transfer", Decimal(1000 + i), "0341234567", "0349876543",
+            "Paiement marchand référence commande " * (i % 4) or None,
+            f"REF{i}",
+        )
+        for i in range(n)
+    ]
+    return schema, rows
+
+
+def render(label: str, schema, rows, out_dir: Path, fast_table: bool):
+    t0 = time.perf_counter()
+    pdf = pdf_exporter.generate_pdf_for_day(
+        day=label,
+        rows=rows,
+        filename_prefix="bench",
+        report_type="up",
+        output_dir=out_dir,
+        account_number="0341234567",
+        schema=schema,
+        fast_table=fast_table,
+    )
+    elapsed = time.perf_counter() - t0
+    pages = pdf.read_bytes().count(b"/Type /Page\n")
+    print(
+        f"{label:<8} | lignes={len(rows):>6} | pages={pages:>5} "
+        f"| {elapsed:7.2f}s | {pages / elapsed:7.1f} pages/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    schema, rows = make_rows(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        render("standard", schema, rows, Path(tmp), fast_table=False)
+        render("fast", schema, rows, Path(tmp), fast_table=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Colonnes TRANS_DATA du REMIT : pivot SQL (LEFT JOIN + MAX(CASE …) + GROUP BY)
+vs lecture en deux phases (TRANS_REPORT, puis clés TRANS_DATA par lots de
+TRANSID et pivot en Python), sur une base SQLite en mémoire qui reproduit
+les tables MCOMMADM.
+
+    python benchmarks/bench_trans_data.py --rows 100000
+"""
+import argparse
+import random
+import sqlite3
+import sys
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from db.oracle import _build_query  # noqa: E402
+from db.trans_data import TRANS_DATA_KEYS, iter_two_phase  # noqa: E402
+
+ND = "0341234567"
+# Clés hors rapport, présentes dans TRANS_DATA et ignorées par les deux stratégies
+NOISE_KEYS = [f"internalKey{i}" for i in range(10)]
+
+
+def make_db(n: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("ATTACH DATABASE ':memory:' AS MCOMMADM")
+    conn.executescript("""
+        CREATE TABLE MCOMMADM.TRANS_REPORT (
+            MODIFIED TEXT, TRANSID TEXT PRIMARY KEY, TRANS_TYPE TEXT,
+            INITIATOR TEXT, AMOUNT NUMERIC, DEBTOR TEXT, CREDITOR TEXT,
+            STATE TEXT, C_PRE_BAL NUMERIC, C_POST_BAL NUMERIC
+        );
+        CREATE TABLE MCOMMADM.TRANS_DATA (TRANSID TEXT, TD_KEY TEXT, VALUE TEXT);
+        CREATE INDEX MCOMMADM.TRANS_REPORT_MODIFIED ON TRANS_REPORT (MODIFIED);
+        CREATE INDEX MCOMMADM.TRANS_DATA_TRANSID ON TRANS_DATA (TRANSID, TD_KEY);
+    """)
+
+    rnd = random.Random(7)
+    start = datetime(2026, 1, 1)
+    keys = list(TRANS_DATA_KEYS) + NOISE_KEYS
+
+    reports, data = [], []
+    for i in range(n):
+        transid = f"TX{i:012d}"
+        amount = rnd.randint(100, 5_000_000)
+        reports.append((
+            (start + timedelta(seconds=i * 5)).isoformat(sep=" "), transid,
+            "transfer", ND, amount, ND, f"034{rnd.randint(0, 9999999):07d}",
+            "Completed", 10_000_000, 10_000_000 - amount,
+        ))
+        for key in keys:
+            if rnd.random() < 0.9:
+                data.append((transid, key, f"{key}-{rnd.randint(0, 999)}"))
+
+    conn.executemany("INSERT INTO MCOMMADM.TRANS_REPORT VALUES (?,?,?,?,?,?,?,?,?,?)", reports)
+    conn.executemany("INSERT INTO MCOMMADM.TRANS_DATA VALUES (?,?,?)", data)
+    conn.commit()
+    return conn
+
+
+def query_for(strategy: str):
+    query, params = _build_query(
+        "remit", ND, datetime(2026, 1, 1), datetime(2030, 1, 1), strategy=strategy
+    )
+    # SQLite compare des textes ISO
+    params["date_debut"] = params["date_debut"].isoformat(sep=" ")
+    params["date_fin"] = params["date_fin"].isoformat(sep=" ")
+    return query, params
+
+
+def run_pivot(conn) -> list[tuple]:
+    query, params = query_for("pivot")
+    with closing(conn.cursor()) as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+
+def run_two_phase(conn) -> list[tuple]:
+    query, params = query_for("two_phase")
+    with closing(conn.cursor()) as cursor:
+        cursor.execute(query, params)
+        return list(iter_two_phase(conn, cursor, transid_idx=1))
+
+
+def measure(label: str, run, conn) -> list[tuple]:
+    t0 = time.perf_counter()
+    rows = run(conn)
+    elapsed = time.perf_counter() - t0
+    print(
+        f"{label:<10} | lignes={len(rows):>8} | {elapsed:7.2f}s "
+        f"| {len(rows) / elapsed:10.0f} lignes/s"
+    )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    conn = make_db(args.rows)
+
+    pivot = measure("pivot", run_pivot, conn)
+    two_phase = measure("two_phase", run_two_phase, conn)
+
+    if pivot != two_phase:
+        raise SystemExit("Résultats différents entre les deux stratégies")
+
+
+if __name__ == "__main__":
+    main()
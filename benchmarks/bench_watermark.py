@@ -0,0 +1,109 @@
+"""
+Filigrane : ImageReader recréé à chaque page (avant) vs logo décodé une fois
+et Form XObject par document (après), sur un rapport de 5 000 lignes.
+
+    python benchmarks/bench_watermark.py --rows 5000
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from PIL import Image  # noqa: E402
+from reportlab.lib.pagesizes import A4, landscape  # noqa: E402
+from reportlab.lib.utils import ImageReader  # noqa: E402
+
+from config.reports import DEFAULT_PDF_COLUMNS  # noqa: E402
+from db.schema import ReportSchema  # noqa: E402
+from export import pdf_exporter  # noqa: E402
+
+
+def _legacy_watermark(canvas, doc):
+    """Ancien filigrane : logo relu et décodé à chaque page."""
+    w, h = landscape(A4)
+    logo = ImageReader(pdf_exporter.WATERMARK_LOGO)
+
+    canvas.saveState()
+    canvas.setFillAlpha(0.08)
+    canvas.translate(w / 2, h / 2)
+    canvas.rotate(45)
+    canvas.drawImage(
+        logo, -120, -120, width=240, height=240,
+        preserveAspectRatio=True, mask="auto",
+    )
+    canvas.restoreState()
+
+
+def make_logo(path: Path):
+    rnd = random.Random(1)
+    img = Image.new("RGBA", (800, 800))
+    img.putdata([
+        (rnd.randint(0, 255), rnd.randint(0, 255), rnd.randint(0, 255), 255)
+        for _ in range(800 * 800)
+    ])
+    img.save(path)
+
+
+def make_rows(n: int):
+    schema = ReportSchema(DEFAULT_PDF_COLUMNS)
+    start = datetime(2026, 1, 1)
+    rows = [
+        (
+            start + timedelta(seconds=i * 10), f"TX{i:012d}", "0341234567",
+            "transfer", Decimal(1000 + i), "0341234567", "0349876543",
+            "Paiement marchand", f"REF{i}",
+        )
+        for i in range(n)
+    ]
+    return schema, rows
+
+
+def render(label: str, schema, rows, out_dir: Path):
+    t0 = time.perf_counter()
+    pdf = pdf_exporter.generate_pdf_for_day(
+        day=label,
+        rows=rows,
+        filename_prefix="bench",
+        report_type="up",
+        output_dir=out_dir,
+        account_number="0341234567",
+        schema=schema,
+    )
+    elapsed = time.perf_counter() - t0
+    print(
+        f"{label:<6} | lignes={len(rows):>6} | {elapsed:7.2f}s "
+        f"| taille={pdf.stat().st_size / 1024:9.1f} Ko"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    schema, rows = make_rows(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        logo = tmp / "logo.png"
+        make_logo(logo)
+        pdf_exporter.WATERMARK_LOGO = str(logo)
+
+        current_watermark = pdf_exporter._draw_watermark
+
+        # Avant : ancien filigrane, appelé depuis le même _on_page
+        pdf_exporter._draw_watermark = _legacy_watermark
+        render("avant", schema, rows, tmp)
+
+        pdf_exporter._draw_watermark = current_watermark
+        render("apres", schema, rows, tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Doublures pour mesurer sans base de production ni relais SMTP :
+
+- `fake_rows` : lignes REMIT / UP réalistes (types Oracle : datetime,
+  Decimal, textes de longueur variable, colonnes TRANS_DATA clairsemées) ;
+- `fake_oracle` : pool `oracledb` factice branché dans `db.oracle`, pour que
+  `iter_reports`, `fetch_reports_bulk` et `main` s'exécutent tels quels ;
+- `SmtpSink` : relais SMTP local qui accepte et compte les messages.
+"""
+import random
+import socketserver
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
+from pathlib import Path
+from typing import Iterator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config.reports import REPORTS, get_report  # noqa: E402
+from db import oracle  # noqa: E402
+
+ND = "0341234567"
+
+TRANS_TYPES = ("transfer", "merchpay", "cashin", "cashout", "remittance", "billpay")
+STATES = ("Completed",) * 9 + ("Failed",)
+CHANNELS = ("USSD", "APP", "API")
+TEXTS = (
+    None,
+    "Paiement marchand",
+    "Paiement facture JIRAMA référence client 00123456",
+    "Transfert international reçu via partenaire, frais inclus, "
+    "référence de suivi communiquée au bénéficiaire par SMS",
+)
+FIRST_NAMES = ("Jean", "Hery", "Fara", "Miora", "John", "Marie")
+LAST_NAMES = ("Rakoto", "Rabe", "Randria", "Doe", "Martin")
+
+# Lignes modèles par (type, compte) : seules date et identifiant varient
+_TEMPLATES = 1024
+
+
+def _value(name: str, rnd: random.Random, nd: str):
+    """Valeur plausible pour une colonne, d'après son nom."""
+    if name == "TRANS_TYPE":
+        return rnd.choice(TRANS_TYPES)
+    if name in ("INITIATOR", "DEBTOR"):
+        return nd
+    if name == "CREDITOR":
+        return f"034{rnd.randint(0, 9_999_999):07d}"
+    if name == "STATE":
+        return rnd.choice(STATES)
+    if name == "CHANNEL":
+        return rnd.choice(CHANNELS)
+    if name == "COMPTE":
+        return "M_Vola"
+    if name in ("AMOUNT", "RRP") or "BALANCE" in name:
+        return Decimal(rnd.randint(100, 5_000_000))
+    if name in ("DETAILS1", "DETAILS2", "DESCRIPTION"):
+        return rnd.choice(TEXTS)
+    if name.endswith("_AMOUNT"):
+        return str(rnd.randint(1, 500_000))
+    if name.endswith("_CURRENCY"):
+        return rnd.choice(("MGA", "EUR"))
+    if name.endswith("_COUNTRY"):
+        return "FR"
+    if name.endswith("FIRSTNAME"):
+        return rnd.choice(FIRST_NAMES)
+    if name.endswith("_NAME"):
+        return rnd.choice(LAST_NAMES)
+    # Autres clés TRANS_DATA : absentes pour une partie des transactions
+    return None if rnd.random() < 0.3 else f"{name[:3]}{rnd.randint(0, 99_999)}"
+
+
+def fake_rows(
+    report_type: str,
+    nd: str,
+    date_debut: datetime,
+    date_fin: datetime,
+    rows_per_day: int,
+    seed: int = 42,
+) -> Iterator[tuple]:
+    """
+    `rows_per_day` lignes par jour de [date_debut, date_fin], réparties sur
+    la journée, dans l'ordre du rapport (décroissant pour les rapports
+    `descending`).
+    """
+    definition = get_report(report_type)
+    columns = definition.schema.columns
+    date_idx = definition.schema.index["DATE_TRANS"]
+    id_idx = definition.schema.index[definition.transid_col]
+
+    rnd = random.Random(f"{seed}-{report_type}-{nd}")
+    templates = [
+        [_value(name, rnd, nd) for name in columns] for _ in range(_TEMPLATES)
+    ]
+
+    days = [
+        date_debut.date() + timedelta(days=i)
+        for i in range((date_fin.date() - date_debut.date()).days + 1)
+    ]
+    slots = range(rows_per_day)
+    if definition.descending:
+        days.reverse()
+        slots = reversed(slots)
+    slots = list(slots)
+    step = 86400 / rows_per_day
+
+    i = 0
+    for day in days:
+        start = datetime.combine(day, time())
+        for j in slots:
+            ts = start + timedelta(seconds=j * step)
+            if not date_debut <= ts <= date_fin:
+                continue
+            row = templates[i % _TEMPLATES].copy()
+            row[date_idx] = ts.replace(microsecond=0)
+            row[id_idx] = f"TX{nd[-4:]}{i:012d}"
+            i += 1
+            yield tuple(row)
+
+
+# ============================================================
+# POOL ORACLE FACTICE
+# ============================================================
+
+class FakeCursor:
+    """Curseur DB-API : `execute` puis `fetchmany` par lots de `arraysize`."""
+
+    def __init__(self, pool: "FakePool"):
+        self.pool = pool
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self.description = None
+        self._rows = iter(())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, query: str, params: dict | None = None, **kwargs):
+        params = {**(params or {}), **kwargs}
+
+        # Type de rapport reconnu à l'alias de sa colonne identifiant
+        definition = next(
+            d for d in REPORTS.values() if f" AS {d.transid_col}" in query
+        )
+        nds = [
+            value for name, value in params.items()
+            if name == "nd" or (name.startswith("nd") and name[2:].isdigit())
+        ]
+
+        self.description = [
+            (name, None, None, None, None, None, True)
+            for name in definition.schema.columns
+        ]
+        self._rows = (
+            row
+            for nd in dict.fromkeys(nds)
+            for row in fake_rows(
+                definition.name, nd, params["date_debut"], params["date_fin"],
+                self.pool.rows_per_day,
+            )
+        )
+
+    def fetchmany(self, size: int | None = None) -> list[tuple]:
+        if self.pool.roundtrip:
+            threading.Event().wait(self.pool.roundtrip)
+        return list(islice(self._rows, size or self.arraysize))
+
+    def close(self):
+        self._rows = iter(())
+
+
+class FakeConnection:
+    def __init__(self, pool: "FakePool"):
+        self.pool = pool
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self.pool)
+
+
+class FakePool:
+    """Ce que `db.oracle` utilise d'un `oracledb.ConnectionPool`."""
+
+    def __init__(self, rows_per_day: int, roundtrip_ms: float = 0, max: int = 4):
+        self.rows_per_day = rows_per_day
+        self.roundtrip = roundtrip_ms / 1000
+        self.max = max
+        self.busy = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> FakeConnection:
+        with self._lock:
+            self.busy += 1
+        return FakeConnection(self)
+
+    def release(self, conn: FakeConnection):
+        with self._lock:
+            self.busy -= 1
+
+    def close(self, force: bool = False):
+        pass
+
+
+@contextmanager
+def fake_oracle(rows_per_day: int, roundtrip_ms: float = 0):
+    """
+    Pool factice installé comme pool du run : `open_oracle_pool` le
+    réutilise, `close_oracle_pool` le retire. `roundtrip_ms` simule
+    l'aller-retour réseau de chaque `fetchmany`.
+    """
+    pool = FakePool(rows_per_day, roundtrip_ms)
+    oracle._pool, oracle._pool_stats = pool, oracle._PoolStats()
+    try:
+        yield pool
+    finally:
+        oracle._pool, oracle._pool_stats = None, None
+
+
+# ============================================================
+# RELAIS SMTP LOCAL
+# ============================================================
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        sink = self.server.sink
+        self.reply("220 sink ESMTP")
+
+        while line := self.rfile.readline():
+            command = line[:4].upper()
+
+            if command == b"EHLO":
+                self.reply("250-sink")
+                self.reply("250 8BITMIME")
+            elif command == b"DATA":
+                self.reply("354 fin avec <CRLF>.<CRLF>")
+                size = 0
+                while (data := self.rfile.readline()) not in (b".\r\n", b""):
+                    size += len(data)
+                sink.received(size)
+                self.reply("250 OK")
+            elif command == b"QUIT":
+                self.reply("221 bye")
+                break
+            else:
+                # HELO, MAIL, RCPT, RSET, NOOP
+                self.reply("250 OK")
+
+
+class _SmtpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SmtpSink:
+    """
+    Relais SMTP local (sans dépendance) : accepte tout, compte messages et
+    octets. `with SmtpSink() as sink:` puis EMAIL_HOST=sink.host,
+    EMAIL_PORT=sink.port.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.messages = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._server = _SmtpServer((host, port), _SmtpHandler)
+        self._server.sink = self
+        self.port = self._server.server_address[1]
+
+    def received(self, size: int):
+        with self._lock:
+            self.messages += 1
+            self.bytes += size
+
+    def __enter__(self) -> "SmtpSink":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
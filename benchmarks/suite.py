@@ -0,0 +1,336 @@
+"""
+Suite de mesures reproductible, sans Oracle ni relais SMTP (voir fakes.py).
+
+Scénarios :
+  fetch_csv   lecture `iter_reports` (pool factice, fetchmany) → CSV
+  pdf_zip     lignes d'un job → PDFs journaliers → ZIP
+  end_to_end  `main.main(send=True)` : jobs complets jusqu'à l'envoi
+              (relais SMTP local)
+
+Chaque scénario tourne dans son propre processus (pic RSS isolé). Résultat
+JSON (lignes/s, pages/s, pic RSS, durée) sur la sortie standard ou dans
+--output ; --compare compare deux résultats (avant / après).
+
+    python benchmarks/suite.py --rows 100000 --days 31 --output avant.json
+    python benchmarks/suite.py --compare avant.json apres.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCENARIOS = ("fetch_csv", "pdf_zip", "end_to_end")
+
+# Caches et sorties annexes désactivés : on mesure le travail complet
+QUIET_ENV = {
+    "REPORT_CACHE_DIR": "",
+    "PDF_CACHE_DIR": "",
+    "METRICS_DIR": "",
+    "METRICS_PROMETHEUS_FILE": "",
+    "ORACLE_PARTITIONS": "",
+    "REMIT_FETCH_STRATEGY": "pivot",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def _peak_rss_mb() -> tuple[float | None, float | None]:
+    """Pic RSS du processus et de ses enfants terminés (rendu PDF), en Mo."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None, None
+
+    # ru_maxrss : Ko sous Linux, octets sous macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return tuple(
+        round(resource.getrusage(who).ru_maxrss * unit / 1024 / 1024, 1)
+        for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)
+    )
+
+
+def _count_pages(zip_paths) -> int:
+    pages = 0
+    for zip_path in zip_paths:
+        with zipfile.ZipFile(zip_path) as z:
+            for name in z.namelist():
+                pages += z.read(name).count(b"/Type /Page\n")
+    return pages
+
+
+def _date_range(days: int) -> tuple[datetime, datetime]:
+    date_debut = datetime(2026, 1, 1)
+    return date_debut, date_debut + timedelta(days=days) - timedelta(seconds=1)
+
+
+# ============================================================
+# SCÉNARIOS (exécutés dans le processus enfant)
+# ============================================================
+
+def scenario_fetch_csv(args, workdir: Path) -> dict:
+    from fakes import ND, fake_oracle
+    from db.oracle import get_report_schema, iter_reports
+    from export.csv_exporter import generate_csv_stream
+
+    date_debut, date_fin = _date_range(args.days)
+    with fake_oracle(args.rows_per_day, args.roundtrip_ms):
+        start = time.perf_counter()
+        csv_file, rows = generate_csv_stream(
+            iter_reports(args.report_type, ND, date_debut, date_fin),
+            filename_prefix="bench",
+            report_type=args.report_type,
+            output_base_dir=str(workdir),
+            schema=get_report_schema(args.report_type),
+        )
+        wall = time.perf_counter() - start
+
+    return {"rows": rows, "wall_s": wall, "output_bytes": csv_file.stat().st_size}
+
+
+def scenario_pdf_zip(args, workdir: Path) -> dict:
+    from fakes import ND, fake_rows
+    from db.oracle import get_report_schema
+    from export.pdf_exporter import day_key, generate_pdfs_by_day
+
+    schema = get_report_schema(args.report_type)
+    date_idx = schema.index["DATE_TRANS"]
+    date_debut, date_fin = _date_range(args.days)
+
+    # Lignes préparées hors mesure, comme après la passe CSV d'un job
+    grouped = defaultdict(list)
+    rows = 0
+    for row in fake_rows(args.report_type, ND, date_debut, date_fin, args.rows_per_day):
+        grouped[day_key(row[date_idx])].append(row)
+        rows += 1
+
+    start = time.perf_counter()
+    zip_path = generate_pdfs_by_day(
+        grouped,
+        filename_prefix="bench",
+        report_type=args.report_type,
+        schema=schema,
+        output_base_dir=str(workdir),
+        account_number=ND,
+        workers=args.pdf_workers,
+        fast_table=args.pdf_mode == "fast",
+    )
+    wall = time.perf_counter() - start
+
+    return {
+        "rows": rows,
+        "wall_s": wall,
+        "pages": _count_pages([zip_path]),
+        "output_bytes": zip_path.stat().st_size,
+    }
+
+
+def scenario_end_to_end(args, workdir: Path) -> dict:
+    from fakes import ND, SmtpSink, fake_oracle
+
+    date_debut, date_fin = _date_range(args.days)
+    os.chdir(workdir)
+
+    with open("report_jobs.csv", "w", encoding="utf-8") as f:
+        f.write("to_email,cc,bcc,subject,template_name,report_type,nd,date_debut,date_fin,pdf_mode\n")
+        for i in range(args.jobs):
+            f.write(
+                f"client{i}@example.mg,,,Bench{i},report.html,{args.report_type},"
+                f"{int(ND) + i:010d},{date_debut:%Y-%m-%d},{date_fin:%Y-%m-%d},"
+                f"{args.pdf_mode}\n"
+            )
+
+    with SmtpSink() as sink, fake_oracle(args.rows_per_day, args.roundtrip_ms):
+        os.environ.update(
+            EMAIL_HOST=sink.host,
+            EMAIL_PORT=str(sink.port),
+            EMAIL_FROM="bench@example.mg",
+            MAIL_SPOOL_DIR=str(workdir / "spool"),
+        )
+        import main
+
+        start = time.perf_counter()
+        main.main(workers=args.workers, pdf_workers=args.pdf_workers, send=True)
+        wall = time.perf_counter() - start
+
+    csv_files = list(Path("outputs").glob(f"{args.report_type}/*.csv"))
+    zip_files = list(Path("outputs/pdf").glob("*/*/*.zip"))
+    rows = sum(
+        sum(1 for _ in open(path, encoding="utf-8")) - 1 for path in csv_files
+    )
+
+    return {
+        "rows": rows,
+        "wall_s": wall,
+        "pages": _count_pages(zip_files),
+        "jobs": len(zip_files),
+        "emails": sink.messages,
+        "email_bytes": sink.bytes,
+    }
+
+
+def run_child(args) -> dict:
+    """Exécute un scénario et retourne ses mesures."""
+    os.environ.update(QUIET_ENV)
+    sys.path.insert(0, str(ROOT / "src"))
+
+    scenario = globals()[f"scenario_{args.run}"]
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        try:
+            result = scenario(args, Path(tmp))
+        finally:
+            os.chdir(cwd)
+
+    rss, rss_children = _peak_rss_mb()
+    wall = result["wall_s"]
+    result.update(
+        scenario=args.run,
+        wall_s=round(wall, 3),
+        rows_per_s=round(result["rows"] / wall, 1) if wall else None,
+        peak_rss_mb=rss,
+        peak_rss_children_mb=rss_children,
+    )
+    if "pages" in result:
+        result["pages_per_s"] = round(result["pages"] / wall, 1) if wall else None
+    return result
+
+
+# ============================================================
+# LANCEMENT / COMPARAISON
+# ============================================================
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args) -> dict:
+    params = {
+        "rows": args.rows,
+        "days": args.days,
+        "rows_per_day": args.rows_per_day,
+        "report_type": args.report_type,
+        "pdf_mode": args.pdf_mode,
+        "pdf_workers": args.pdf_workers,
+        "jobs": args.jobs,
+        "workers": args.workers,
+        "roundtrip_ms": args.roundtrip_ms,
+    }
+    child_args = [
+        f"--{name.replace('_', '-')}={value}"
+        for name, value in params.items()
+        if name != "rows_per_day" and value is not None
+    ]
+
+    results = []
+    for scenario in args.scenario:
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+            result_file = Path(f.name)
+        try:
+            proc = subprocess.run(
+                [sys.executable, __file__, f"--run={scenario}",
+                 f"--result-file={result_file}", *child_args],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                sys.stderr.write(proc.stdout[-2000:] + proc.stderr[-4000:])
+                raise SystemExit(f"Scénario {scenario} en échec")
+            result = json.loads(result_file.read_text(encoding="utf-8"))
+        finally:
+            result_file.unlink(missing_ok=True)
+
+        results.append(result)
+        print(
+            f"{scenario:<11} | lignes={result['rows']:>9} | {result['wall_s']:8.2f}s "
+            f"| {result['rows_per_s'] or 0:>10.0f} lignes/s "
+            f"| {result.get('pages_per_s') or 0:>7.1f} pages/s "
+            f"| RSS={result['peak_rss_mb'] or 0:>7.1f} Mo "
+            f"(+{result['peak_rss_children_mb'] or 0:.1f} Mo enfants)",
+            file=sys.stderr,
+        )
+
+    return {
+        "revision": _git_revision(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "results": results,
+    }
+
+
+def compare(before_path: str, after_path: str):
+    before = json.loads(Path(before_path).read_text(encoding="utf-8"))
+    after = json.loads(Path(after_path).read_text(encoding="utf-8"))
+
+    if before["params"] != after["params"]:
+        print("Attention : paramètres différents entre les deux résultats")
+
+    previous = {r["scenario"]: r for r in before["results"]}
+    for result in after["results"]:
+        old = previous.get(result["scenario"])
+        if old is None:
+            continue
+        cells = []
+        for key in ("wall_s", "rows_per_s", "pages_per_s", "peak_rss_mb"):
+            if old.get(key) and result.get(key):
+                cells.append(f"{key}={old[key]}→{result[key]} (×{result[key] / old[key]:.2f})")
+        print(f"{result['scenario']:<11} | " + " | ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=100_000,
+                        help="Lignes par job (1 000 à 5 000 000)")
+    parser.add_argument("--days", type=int, default=31, choices=range(1, 32),
+                        metavar="1-31", help="Jours couverts par un job")
+    parser.add_argument("--report-type", default="remit", choices=("remit", "up"))
+    parser.add_argument("--pdf-mode", default="standard", choices=("standard", "fast"))
+    parser.add_argument("--pdf-workers", type=int, default=None)
+    parser.add_argument("--jobs", type=int, default=4, help="Jobs du scénario end_to_end")
+    parser.add_argument("--workers", type=int, default=1, help="--workers de main (end_to_end)")
+    parser.add_argument("--roundtrip-ms", type=float, default=0,
+                        help="Aller-retour réseau simulé par fetchmany")
+    parser.add_argument("--scenario", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--output", help="Fichier JSON de résultats (défaut : sortie standard)")
+    parser.add_argument("--compare", nargs=2, metavar=("AVANT", "APRES"))
+    parser.add_argument("--run", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    args.rows_per_day = -(-args.rows // args.days)
+
+    if args.run:
+        result = run_child(args)
+        Path(args.result_file).write_text(json.dumps(result), encoding="utf-8")
+        return
+
+    report = json.dumps(run_suite(args), indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,7 @@ def generate_report_job_csv_template(
         "date_debut",
         "date_fin",
         "partition",
+        "pdf_mode",
     ]
 
     output_path = Path(output_file)
@@ -36,6 +37,7 @@ def generate_report_job_csv_template(
             "2026-01-01",
             "2026-01-01",
             "P202601",
+            "standard",
         ])
 
     return str(output_path)
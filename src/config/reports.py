@@ -0,0 +1,214 @@
+import os
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from db.schema import ReportSchema
+
+logger = logging.getLogger("send_report")
+
+
+# ============================================================
+# DÉFINITION D'UN TYPE DE RAPPORT
+# ============================================================
+
+# Colonnes / libellés PDF par défaut (seules celles présentes dans le
+# schéma du rapport sont rendues)
+DEFAULT_PDF_COLUMNS = (
+    "DATE_TRANS", "N_TRANSACTION", "INITIATOR", "TRANS_TYPE",
+    "AMOUNT", "DEBTOR", "CREDITOR", "DETAILS1", "DETAILS2",
+)
+
+DEFAULT_PDF_LABELS = {
+    "DATE_TRANS": "Date / Heure",
+    "N_TRANSACTION": "N° Transaction",
+    "INITIATOR": "Initiateur",
+    "TRANS_TYPE": "Type",
+    "AMOUNT": "Montant",
+    "DEBTOR": "Débiteur",
+    "CREDITOR": "Créditeur",
+    "DETAILS1": "Détails 1",
+    "DETAILS2": "Détails 2",
+}
+
+# Formatage des cellules PDF : colonne → "date" | "amount"
+DEFAULT_PDF_FORMATTERS = {"DATE_TRANS": "date", "AMOUNT": "amount"}
+
+# Largeurs fixes (mm) ; les autres colonnes se partagent la page
+DEFAULT_PDF_WIDTHS = {"DATE_TRANS": 35, "AMOUNT": 25}
+
+
+@dataclass(frozen=True)
+class ReportDefinition:
+    """
+    Tout ce qu'il faut pour produire un type de rapport : requête, colonnes
+    et mise en page PDF.
+
+    `sql` est un gabarit dont les marqueurs sont remplacés une fois par
+    variante (voir `db.oracle.query_text`) :
+      {partition_clause}  ` PARTITION (<nom>)` ou vide
+      {nd_filter}         filtre compte (:nd, ou liste IN :nd0… en mode groupé)
+      {trans_data_columns}, {trans_data_join}, {group_by}
+                          colonnes TRANS_DATA (rapports `trans_data` seulement)
+    Binds toujours fournis : :date_debut, :date_fin et ceux du filtre compte.
+
+    `descending` : lignes triées par date décroissante (ordre de lecture des
+    partitions).
+    """
+
+    name: str
+    sql: str
+    schema: ReportSchema
+    transid_col: str
+    group_by: str = ""
+    trans_data: bool = False
+    descending: bool = False
+    pdf_columns: tuple = DEFAULT_PDF_COLUMNS
+    pdf_labels: dict = field(default_factory=lambda: dict(DEFAULT_PDF_LABELS))
+    pdf_formatters: dict = field(default_factory=lambda: dict(DEFAULT_PDF_FORMATTERS))
+    pdf_widths: dict = field(default_factory=lambda: dict(DEFAULT_PDF_WIDTHS))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ReportDefinition":
+        """Définition lue depuis un fichier JSON (voir REPORTS_FILE)."""
+        data = dict(data)
+        data["schema"] = ReportSchema(data["schema"])
+        if "pdf_columns" in data:
+            data["pdf_columns"] = tuple(data["pdf_columns"])
+        return cls(**data)
+
+
+# ============================================================
+# RAPPORTS INTÉGRÉS
+# ============================================================
+
+REMIT = ReportDefinition(
+    name="remit",
+    sql="""
+    SELECT
+        tr.MODIFIED AS DATE_TRANS,
+        tr.TRANSID AS REFMVOLA,
+        tr.TRANS_TYPE,
+        tr.INITIATOR,
+        tr.AMOUNT,
+        tr.DEBTOR,
+        tr.CREDITOR,
+        tr.STATE,
+        tr.C_PRE_BAL AS BALANCE_AVANT,
+        tr.C_POST_BAL AS BALANCE_APRES{trans_data_columns}
+    FROM MCOMMADM.TRANS_REPORT{partition_clause} tr{trans_data_join}
+    WHERE
+        {nd_filter}
+        AND tr.TRANS_TYPE NOT IN (
+            'login','balance','logout','create_batch','report','trans_query_ext'
+        )
+        AND tr.MODIFIED BETWEEN :date_debut AND :date_fin{group_by}
+    ORDER BY tr.MODIFIED ASC
+        """,
+    group_by="""
+    GROUP BY
+        tr.MODIFIED,
+        tr.TRANSID,
+        tr.TRANS_TYPE,
+        tr.INITIATOR,
+        tr.AMOUNT,
+        tr.DEBTOR,
+        tr.CREDITOR,
+        tr.STATE,
+        tr.C_PRE_BAL,
+        tr.C_POST_BAL""",
+    trans_data=True,
+    transid_col="REFMVOLA",
+    schema=ReportSchema([
+        "DATE_TRANS", "REFMVOLA", "TRANS_TYPE", "INITIATOR", "AMOUNT",
+        "DEBTOR", "CREDITOR", "STATE", "BALANCE_AVANT", "BALANCE_APRES",
+        "OPERATION_TYPE", "DESCRIPTION", "PARTNER_ID", "PARTNER_WALLET_ID",
+        "PARTNER_WORKFLOW_ID", "SENDING_PARTNER", "RECEIVER_FIRSTNAME",
+        "RECEIVER_NAME", "RECEIVER_AMOUNT", "RECEIVER_CURRENCY",
+        "SENDER_FIRSTNAME", "SENDER_NAME", "SENDER_ACCOUNT_ID",
+        "SENDER_AMOUNT", "SENDER_CURRENCY", "SENDER_COUNTRY", "EXT_REFERENCE",
+    ]),
+)
+
+UP = ReportDefinition(
+    name="up",
+    sql="""
+                SELECT
+                tr.MODIFIED AS DATE_TRANS,
+                tr.TRANSID AS N_TRANSACTION,
+                tr.INITIATOR,
+                tr.TRANS_TYPE,
+                tr.CHANNEL,
+                tr.STATE,
+                CASE WHEN tr.WALLET = 'EWallet' THEN 'M_Vola' ELSE tr.WALLET END AS COMPTE,
+                tr.AMOUNT,
+                tr.RRP,
+                tr.DEBTOR,
+                tr.CREDITOR,
+                tr.D_PRE_BAL AS DE_BALANCE_AVANT,
+                tr.D_POST_BAL AS DE_BALANCE_APRES,
+                tr.C_PRE_BAL AS VERS_BALANCE_AVANT,
+                tr.C_POST_BAL AS VERS_BALANCE_APRES,
+                tr.DETAILS1,
+                tr.DETAILS2
+            FROM MCOMMADM.TRANS_REPORT {partition_clause} tr
+            WHERE
+                {nd_filter}
+                AND tr.TRANS_TYPE NOT IN (
+                    'login','balance','logout','create_batch','report','trans_query_ext'
+                )
+                AND tr.MODIFIED BETWEEN :date_debut AND :date_fin
+            ORDER BY tr.MODIFIED DESC
+        """,
+    descending=True,
+    transid_col="N_TRANSACTION",
+    schema=ReportSchema([
+        "DATE_TRANS", "N_TRANSACTION", "INITIATOR", "TRANS_TYPE", "CHANNEL",
+        "STATE", "COMPTE", "AMOUNT", "RRP", "DEBTOR", "CREDITOR",
+        "DE_BALANCE_AVANT", "DE_BALANCE_APRES", "VERS_BALANCE_AVANT",
+        "VERS_BALANCE_APRES", "DETAILS1", "DETAILS2",
+    ]),
+)
+
+
+# ============================================================
+# REGISTRE
+# ============================================================
+
+REPORTS: dict[str, ReportDefinition] = {}
+
+
+def register_report(definition: ReportDefinition):
+    """Ajoute (ou remplace) un type de rapport."""
+    REPORTS[definition.name.lower()] = definition
+
+
+def get_report(report_type: str) -> ReportDefinition:
+    """Définition d'un type de rapport ; ValueError s'il est inconnu."""
+    try:
+        return REPORTS[report_type.lower()]
+    except KeyError:
+        raise ValueError(f"Type de rapport non supporté: {report_type}") from None
+
+
+def load_report_file(path: str | Path):
+    """
+    Charge des définitions supplémentaires depuis un fichier JSON : une liste
+    d'objets aux champs de `ReportDefinition` (`schema` = liste de colonnes).
+    """
+    with open(path, encoding="utf-8") as f:
+        definitions = json.load(f)
+
+    for data in definitions:
+        register_report(ReportDefinition.from_dict(data))
+
+    logger.info(f"Types de rapport chargés depuis {path} : {len(definitions)}")
+
+
+for _definition in (REMIT, UP):
+    register_report(_definition)
+
+# Rapports supplémentaires (données, pas de code) chargés une fois au démarrage
+if os.getenv("REPORTS_FILE"):
+    load_report_file(os.getenv("REPORTS_FILE"))
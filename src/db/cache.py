@@ -0,0 +1,234 @@
+import os
+import time
+import pickle
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+
+logger = logging.getLogger('send_report')
+
+# Compteurs hits / miss du thread courant, voir `cache_usage`
+_usage = threading.local()
+
+
+# ============================================================
+# CACHE LOCAL DES RÉSULTATS PAR JOUR
+# ============================================================
+
+class ResultCache:
+    """
+    Lignes de rapport par (type, compte, partition, jour), dans une base
+    SQLite locale.
+
+    Un jour déjà terminé au moment de sa lecture ne change plus dans
+    TRANS_REPORT : il est servi depuis le cache sans limite de durée. Un jour
+    encore ouvert (jour courant) n'est réutilisé que pendant `freshness`
+    secondes.
+
+    Les lignes sont rangées sous la version de la définition du rapport qui
+    les a produites (`version`, empreinte requête + colonnes) : après une
+    modification de la définition, les anciennes lignes ne sont plus servies.
+    """
+
+    def __init__(self, path: Path, freshness: float):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.freshness = freshness
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+
+        # Cache d'une version antérieure (sans version de définition) : vidé
+        columns = [col[1] for col in self._conn.execute("PRAGMA table_info(segments)")]
+        if columns and "version" not in columns:
+            logger.info(f"Cache résultats à l'ancien format vidé : {path}")
+            self._conn.execute("DROP TABLE segments")
+
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS segments (
+                report_type TEXT NOT NULL,
+                nd TEXT NOT NULL,
+                partition TEXT NOT NULL,
+                version TEXT NOT NULL,
+                day TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                complete INTEGER NOT NULL,
+                rows BLOB NOT NULL,
+                PRIMARY KEY (report_type, nd, partition, version, day)
+            )
+        """)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def _valid(self, fetched_at: float, complete: int, now: float) -> bool:
+        return bool(complete) or now - fetched_at < self.freshness
+
+    def valid_days(
+        self,
+        report_type: str,
+        nd: str,
+        partition: str | None,
+        version: str,
+        days: list[date],
+    ) -> set[date]:
+        """
+        Jours encore valides du cache, sans charger leurs lignes. Les hits
+        et miss sont comptés au service (`get`) et à la lecture (`put`).
+        """
+        now = time.time()
+        wanted = {day.isoformat() for day in days}
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, fetched_at, complete FROM segments "
+                "WHERE report_type = ? AND nd = ? AND partition = ? AND version = ? "
+                "AND day BETWEEN ? AND ?",
+                (
+                    report_type.lower(), nd, partition or "", version,
+                    min(wanted), max(wanted),
+                ),
+            ).fetchall()
+
+        return {
+            date.fromisoformat(day)
+            for day, fetched_at, complete in rows
+            if day in wanted and self._valid(fetched_at, complete, now)
+        }
+
+    def get(
+        self,
+        report_type: str,
+        nd: str,
+        partition: str | None,
+        version: str,
+        day: date,
+    ) -> list[tuple] | None:
+        """
+        Lignes d'un jour, servies depuis le cache (un hit), ou None s'il
+        n'est pas (ou plus) valide en cache.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, complete, rows FROM segments "
+                "WHERE report_type = ? AND nd = ? AND partition = ? AND version = ? "
+                "AND day = ?",
+                (report_type.lower(), nd, partition or "", version, day.isoformat()),
+            ).fetchone()
+
+        if row is None or not self._valid(row[0], row[1], time.time()):
+            return None
+        self._count("hits")
+        return pickle.loads(row[2])
+
+    def put(
+        self,
+        report_type: str,
+        nd: str,
+        partition: str | None,
+        version: str,
+        day: date,
+        rows: list[tuple],
+    ):
+        """Enregistre les lignes d'un jour lu depuis Oracle (un miss, jour vide compris)."""
+        fetched_at = time.time()
+        today = datetime.fromtimestamp(fetched_at).date()
+        blob = pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    report_type.lower(), nd, partition or "", version, day.isoformat(),
+                    fetched_at, int(day < today), blob,
+                ),
+            )
+            self._conn.commit()
+        self._count("misses")
+
+    def _count(self, kind: str):
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + 1)
+        counts = getattr(_usage, "counts", None)
+        if counts is not None:
+            counts[kind] += 1
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"jours en cache={self.hits}, jours lus depuis Oracle={self.misses} ({rate:.0f}% de hits)"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache: ResultCache | None = None
+
+
+def open_result_cache():
+    """
+    Ouvre le cache de résultats si REPORT_CACHE_DIR est défini
+    (fraîcheur du jour courant : REPORT_CACHE_FRESHNESS secondes, défaut 900).
+    """
+    global _cache
+
+    cache_dir = os.getenv("REPORT_CACHE_DIR")
+    if not cache_dir or _cache is not None:
+        return
+
+    _cache = ResultCache(
+        Path(cache_dir) / "results.sqlite3",
+        freshness=float(os.getenv("REPORT_CACHE_FRESHNESS", 900)),
+    )
+    logger.info(f"Cache résultats ouvert : {_cache.path}")
+
+
+def close_result_cache():
+    """Ferme le cache et journalise ses hits / miss."""
+    global _cache
+
+    if _cache is None:
+        return
+
+    logger.info(f"Statistiques cache résultats: {_cache.summary()}")
+    _cache.close()
+    _cache = None
+
+
+@contextmanager
+def cache_usage():
+    """
+    Jours servis depuis le cache (`hits`) et lus depuis Oracle (`misses`)
+    pendant le bloc, dans le thread courant (celui qui consomme les lignes) :
+
+        with cache_usage() as usage:
+            rows = list(iter_reports(...))
+        usage["hits"], usage["misses"]
+    """
+    previous = getattr(_usage, "counts", None)
+    counts = {"hits": 0, "misses": 0}
+    _usage.counts = counts
+    try:
+        yield counts
+    finally:
+        _usage.counts = previous
+        if previous is not None:
+            previous["hits"] += counts["hits"]
+            previous["misses"] += counts["misses"]
+
+
+@contextmanager
+def result_cache():
+    """Cache de résultats ouvert pour la durée d'un run (si configuré)."""
+    open_result_cache()
+    try:
+        yield _cache
+    finally:
+        close_result_cache()
+
+
+def get_result_cache() -> ResultCache | None:
+    return _cache
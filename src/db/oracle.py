@@ -1,8 +1,27 @@
 import os
+import time
+import hashlib
 import logging
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Iterator
 import oracledb
 
+from config.reports import get_report
+from db.cache import ResultCache, get_result_cache
+from db.partitions import (
+    PARTITION_LOOKUP,
+    parse_high_value,
+    partition_scheme,
+    partitions_from_bounds,
+    partitions_from_format,
+)
+from db.schema import ReportSchema
+from db.trans_data import TRANS_DATA_KEYS, fetch_strategy, iter_two_phase, pivot_columns_sql
+
 logger = logging.getLogger('send_report')
 
 # Variable globale pour tracker l'initialisation
@@ -12,7 +31,8 @@ _oracle_initialized = False
 def _init_oracle_thick():
     """
     Initialise Oracle en mode THICK si ORACLE_CLIENT_LIB est défini.
-    Appelé automatiquement au chargement du module.
+    Appelé avant la première connexion (pas au chargement du module : les
+    processus de rendu PDF l'importent sans se connecter).
     """
     global _oracle_initialized
     if _oracle_initialized:
@@ -33,25 +53,19 @@ def _init_oracle_thick():
             raise
     else:
         logger.warning("ORACLE_CLIENT_LIB non défini, impossible d'utiliser le mode THICK")
+        _oracle_initialized = True
 
 
-# ✅ Appel immédiat au chargement du module
-_init_oracle_thick()
-
-
-def get_oracle_connection():
+def _connection_params() -> dict:
     """
-    Établit une connexion à Oracle.
-    
-    Le mode (THIN/THICK) est déterminé par la présence de ORACLE_CLIENT_LIB.
-    
+    Lit les paramètres de connexion Oracle depuis l'environnement.
+
     Nécessite les variables d'environnement:
     - ORACLE_HOST
     - ORACLE_PORT
     - ORACLE_SERVICE
     - ORACLE_USER
     - ORACLE_PASSWORD
-    - ORACLE_CLIENT_LIB (optionnel, pour mode THICK)
     """
     host = os.getenv("ORACLE_HOST")
     port = os.getenv("ORACLE_PORT")
@@ -71,16 +85,29 @@ def get_oracle_connection():
         raise ValueError(f"Variables d'environnement manquantes: {', '.join(missing)}")
     
     # Format DSN: host:port/service
-    dsn = f"{host}:{port}/{service}"
+    return {
+        "user": user,
+        "password": password,
+        "dsn": f"{host}:{port}/{service}",
+        # Requêtes analysées gardées par connexion (une par variante de query_text)
+        "stmtcachesize": int(os.getenv("ORACLE_STMT_CACHE", 50)),
+    }
+
+
+def get_oracle_connection():
+    """
+    Établit une connexion à Oracle.
+    
+    Le mode (THIN/THICK) est déterminé par la présence de ORACLE_CLIENT_LIB.
+    Voir `_connection_params` pour les variables d'environnement requises.
+    """
+    _init_oracle_thick()
+    params = _connection_params()
     
-    logger.debug(f"Connexion Oracle: {user}@{dsn}")
+    logger.debug(f"Connexion Oracle: {params['user']}@{params['dsn']}")
     
     try:
-        connection = oracledb.connect(
-            user=user,
-            password=password,
-            dsn=dsn
-        )
+        connection = oracledb.connect(**params)
         logger.info(f"Connexion réussie - Version Oracle: {connection.version}")
         return connection
     except oracledb.DatabaseError as e:
@@ -88,175 +115,719 @@ def get_oracle_connection():
         raise
 
 
-def fetch_reports(
+# ============================================================
+# POOL DE CONNEXIONS (partagé par tous les jobs d'un run)
+# ============================================================
+
+class _PoolStats:
+    """
+    Compteurs d'utilisation du pool, pour dimensionner ORACLE_POOL_*.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquires = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    def acquired(self, waited: bool, elapsed: float):
+        with self._lock:
+            self.acquires += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds += elapsed
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def released(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def summary(self) -> str:
+        return (
+            f"acquisitions={self.acquires}, attentes={self.waits} "
+            f"({self.wait_seconds:.2f}s), pic utilisées={self.peak_in_use}"
+        )
+
+
+_pool = None
+_pool_stats: _PoolStats | None = None
+
+
+def open_oracle_pool():
+    """
+    Ouvre le pool de connexions Oracle partagé par tous les jobs du run.
+
+    Variables d'environnement (optionnelles):
+    - ORACLE_POOL_MIN      : connexions ouvertes au démarrage (défaut 1)
+    - ORACLE_POOL_MAX      : connexions simultanées maximum (défaut 4)
+    - ORACLE_POOL_INCREMENT: connexions ouvertes à la fois (défaut 1)
+    - ORACLE_POOL_TIMEOUT  : attente maximum d'une connexion libre, en secondes (défaut 30)
+    """
+    global _pool, _pool_stats
+
+    if _pool is not None:
+        return _pool
+
+    _init_oracle_thick()
+    params = _connection_params()
+    pool_min = int(os.getenv("ORACLE_POOL_MIN", 1))
+    pool_max = int(os.getenv("ORACLE_POOL_MAX", 4))
+    increment = int(os.getenv("ORACLE_POOL_INCREMENT", 1))
+    wait_timeout = int(float(os.getenv("ORACLE_POOL_TIMEOUT", 30)) * 1000)
+
+    logger.info(
+        f"Ouverture pool Oracle: {params['user']}@{params['dsn']} "
+        f"(min={pool_min}, max={pool_max}, timeout={wait_timeout} ms)"
+    )
+
+    try:
+        _pool = oracledb.create_pool(
+            **params,
+            min=pool_min,
+            max=pool_max,
+            increment=increment,
+            getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+            wait_timeout=wait_timeout,
+        )
+    except oracledb.DatabaseError as e:
+        logger.error(f"Erreur ouverture pool Oracle: {e}")
+        raise
+
+    _pool_stats = _PoolStats()
+    return _pool
+
+
+def close_oracle_pool():
+    """
+    Ferme le pool partagé et journalise ses statistiques d'utilisation.
+    """
+    global _pool, _pool_stats
+
+    if _pool is None:
+        return
+
+    logger.info(f"Statistiques pool Oracle: {_pool_stats.summary()}")
+
+    try:
+        _pool.close(force=True)
+    except oracledb.Error as e:
+        logger.warning(f"Erreur fermeture pool Oracle: {e}")
+    finally:
+        _pool = None
+        _pool_stats = None
+        logger.debug("Pool Oracle fermé")
+
+
+@contextmanager
+def oracle_pool():
+    """
+    Ouvre le pool pour la durée d'un run: `with oracle_pool(): ...`
+    """
+    open_oracle_pool()
+    try:
+        yield _pool
+    finally:
+        close_oracle_pool()
+
+
+@contextmanager
+def _acquire_connection():
+    """
+    Emprunte une connexion au pool s'il est ouvert, sinon ouvre
+    une connexion dédiée (usage ponctuel hors `main`).
+    """
+    if _pool is None:
+        conn = get_oracle_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+            logger.debug("Connexion Oracle fermée")
+        return
+
+    pool, stats = _pool, _pool_stats
+    waited = pool.busy >= pool.max
+    start = time.perf_counter()
+    conn = pool.acquire()
+    stats.acquired(waited, time.perf_counter() - start)
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+        stats.released()
+        logger.debug("Connexion Oracle rendue au pool")
+
+
+def get_report_schema(report_type: str) -> ReportSchema:
+    """
+    Retourne le schéma de colonnes des lignes produites pour ce type de rapport.
+    """
+    return get_report(report_type).schema
+
+
+def _nd_filter(bind_names: list[str]) -> str:
+    """Filtre compte : un bind unique, ou une liste IN (mode groupé)."""
+    if len(bind_names) == 1:
+        bind = f":{bind_names[0]}"
+        return f"(tr.INITIATOR = {bind} OR tr.CREDITOR = {bind} OR tr.DEBTOR = {bind})"
+
+    in_list = ", ".join(f":{name}" for name in bind_names)
+    return (
+        f"(tr.INITIATOR IN ({in_list}) OR tr.CREDITOR IN ({in_list}) "
+        f"OR tr.DEBTOR IN ({in_list}))"
+    )
+
+
+@lru_cache(maxsize=None)
+def query_text(
+    report_type: str,
+    partition: str | None,
+    nd_count: int,
+    strategy: str,
+) -> str:
+    """
+    Texte SQL d'une variante de requête, construit une seule fois par run.
+
+    Un même texte pour une même variante permet au cache de requêtes du
+    driver (ORACLE_STMT_CACHE) de réutiliser l'analyse côté serveur.
+
+    Args:
+        report_type: Type de rapport enregistré
+        partition: Nom de la partition Oracle (optionnel)
+        nd_count: 0 pour un compte (:nd), sinon nombre de binds :nd0…
+        strategy: Lecture des colonnes TRANS_DATA (pivot / two_phase)
+    """
+    definition = get_report(report_type)
+
+    bind_names = [f"nd{i}" for i in range(nd_count)] if nd_count else ["nd"]
+    partition_clause = f" PARTITION ({partition})" if partition else ""
+
+    # Colonnes TRANS_DATA : pivot SQL, ou complétées ensuite (two_phase)
+    pivot = definition.trans_data and strategy == "pivot"
+
+    return (
+        definition.sql
+        .replace("{partition_clause}", partition_clause)
+        .replace("{nd_filter}", _nd_filter(bind_names))
+        .replace("{trans_data_columns}", ",\n" + pivot_columns_sql() if pivot else "")
+        .replace(
+            "{trans_data_join}",
+            "\n    LEFT JOIN MCOMMADM.TRANS_DATA td ON td.TRANSID = tr.TRANSID"
+            if pivot else "",
+        )
+        .replace("{group_by}", definition.group_by if pivot else "")
+    )
+
+
+def _build_query(
+    report_type: str,
+    nd: str | list[str],
+    date_debut: datetime,
+    date_fin: datetime,
+    partition: str | None = None,
+    strategy: str | None = None,
+) -> tuple[str, dict]:
+    """
+    Retourne la requête SQL (voir `query_text`) et ses paramètres.
+
+    `nd` peut être une liste de comptes (mode groupé, binds :nd0, :nd1…).
+    `strategy` : lecture des colonnes TRANS_DATA (défaut
+    `fetch_strategy(report_type)`) ; en two_phase la requête ne lit que
+    TRANS_REPORT.
+    """
+    if isinstance(nd, str):
+        nd_binds = {"nd": nd}
+        nd_count = 0
+    else:
+        nd_binds = {f"nd{i}": value for i, value in enumerate(nd)}
+        nd_count = len(nd_binds)
+
+    query = query_text(
+        report_type.lower(),
+        partition,
+        nd_count,
+        strategy or fetch_strategy(report_type),
+    )
+
+    params = {
+        **nd_binds,
+        'date_debut': date_debut,
+        'date_fin': date_fin
+    }
+
+    return query, params
+
+
+# ============================================================
+# PARTITIONS
+# ============================================================
+
+_partition_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _partition_bounds(owner: str, table: str) -> tuple[tuple[str, datetime], ...]:
+    """
+    Bornes hautes des partitions d'une table, lues une seule fois par run
+    dans ALL_TAB_PARTITIONS (ORACLE_PARTITIONS=lookup).
+    """
+    query = """
+        SELECT PARTITION_NAME, HIGH_VALUE
+        FROM ALL_TAB_PARTITIONS
+        WHERE TABLE_OWNER = :owner AND TABLE_NAME = :table_name
+        ORDER BY PARTITION_POSITION
+    """
+    with _acquire_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(query, owner=owner, table_name=table)
+        bounds = tuple((name, parse_high_value(high)) for name, high in cursor)
+
+    logger.info(f"Partitions {owner}.{table} : {len(bounds)} (ALL_TAB_PARTITIONS)")
+    return bounds
+
+
+def resolve_partitions(
+    report_type: str,
+    partition: str | None,
+    date_debut: datetime,
+    date_fin: datetime,
+) -> list[str | None]:
+    """
+    Partitions à interroger, dans l'ordre du rapport (décroissant si le
+    rapport est trié par date décroissante).
+
+    La partition du job est conservée si elle est indiquée ; sinon, les
+    partitions couvrant la plage selon ORACLE_PARTITIONS ; à défaut (pas de
+    découpage, ou aucune partition trouvée), [None] (table entière,
+    comportement historique).
+    """
+    scheme = partition_scheme()
+    if scheme is None:
+        return [partition]
+
+    if scheme == PARTITION_LOOKUP:
+        with _partition_lock:
+            bounds = _partition_bounds("MCOMMADM", "TRANS_REPORT")
+        derived = partitions_from_bounds(bounds, date_debut, date_fin)
+    else:
+        derived = partitions_from_format(scheme, date_debut, date_fin)
+
+    if partition:
+        if derived != [partition]:
+            logger.warning(
+                f"Partition {partition} indiquée, plage {date_debut} → {date_fin} "
+                f"couverte par {derived} : partition du job conservée"
+            )
+        return [partition]
+
+    if not derived:
+        # Aucune borne lue (table non partitionnée, droits) ou plage hors
+        # des partitions : jamais de job vide en silence
+        logger.warning(
+            f"Plage {date_debut} → {date_fin} : aucune partition trouvée "
+            f"(ORACLE_PARTITIONS={scheme}) → table entière"
+        )
+        return [None]
+
+    if get_report(report_type).descending:
+        derived.reverse()
+
+    if len(derived) > 1:
+        logger.info(f"Plage {date_debut} → {date_fin} : partitions {', '.join(derived)}")
+
+    return derived
+
+
+def iter_reports(
     report_type: str,
     nd: str,
     date_debut: datetime,
     date_fin: datetime,
     partition: str | None = None,
-) -> list[dict]:
+    arraysize: int | None = None,
+    prefetchrows: int | None = None,
+) -> Iterator[tuple]:
     """
-    Récupère les rapports depuis Oracle selon les critères.
-    
+    Itère sur les rapports Oracle par lots `cursor.fetchmany`, sans
+    matérialiser tout le résultat en mémoire.
+
+    Les lignes sont des tuples ordonnés selon `get_report_schema(report_type)`.
+
+    La connexion est gardée pendant toute l'itération et rendue au pool
+    à la fin (ou à la fermeture du générateur).
+
     Args:
         report_type: Type de rapport ('remit', 'up', 'down', etc.)
         nd: Numéro de téléphone
         date_debut: Date de début
         date_fin: Date de fin
         partition: Nom de la partition Oracle (optionnel)
-    
-    Returns:
-        Liste de dictionnaires contenant les résultats
+        arraysize: Taille des lots fetchmany (défaut ORACLE_ARRAYSIZE ou 1000)
+        prefetchrows: Lignes pré-chargées à l'exécution (défaut ORACLE_PREFETCHROWS ou arraysize)
+
+    Yields:
+        Un tuple par ligne de résultat
     """
-    logger.debug("=== Paramètres fetch_reports ===")
+    logger.debug("=== Paramètres iter_reports ===")
     logger.debug(f"report_type  : {report_type}")
     logger.debug(f"nd           : {nd}")
     logger.debug(f"date_debut   : {date_debut}")
     logger.debug(f"date_fin     : {date_fin}")
     logger.debug(f"partition    : {partition}")
-    
-    conn = None
-    cursor = None
-    
+
+    cache = get_result_cache()
+    if cache is not None and _whole_days(date_debut, date_fin):
+        yield from _iter_cached(
+            cache, report_type, nd, date_debut, date_fin, partition,
+            arraysize, prefetchrows,
+        )
+        return
+
+    yield from _iter_oracle(
+        report_type, nd, date_debut, date_fin, partition, arraysize, prefetchrows
+    )
+
+
+def _iter_oracle(
+    report_type: str,
+    nd: str,
+    date_debut: datetime,
+    date_fin: datetime,
+    partition: str | None = None,
+    arraysize: int | None = None,
+    prefetchrows: int | None = None,
+) -> Iterator[tuple]:
+    """Lecture Oracle (une requête par partition), sans cache."""
+    strategy = fetch_strategy(report_type)
+    queries = [
+        _build_query(report_type, nd, date_debut, date_fin, part, strategy)
+        for part in resolve_partitions(report_type, partition, date_debut, date_fin)
+    ]
+
+    yield from _execute_all(report_type, queries, arraysize, prefetchrows, strategy)
+
+
+def _whole_days(date_debut: datetime, date_fin: datetime) -> bool:
+    """Plage de jours entiers (00:00:00 → 23:59:59), seule éligible au cache."""
+    return (
+        date_debut.time() == dt_time.min
+        and date_fin.time() >= dt_time(23, 59, 59)
+    )
+
+
+def _definition_version(report_type: str) -> str:
+    """
+    Empreinte de la définition du rapport (requête, colonnes) : version des
+    lignes rangées dans le cache de résultats.
+    """
+    definition = get_report(report_type)
+    parts = [definition.sql, definition.group_by, definition.schema.columns]
+    if definition.trans_data:
+        parts.append(TRANS_DATA_KEYS)
+
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def _iter_cached(
+    cache: ResultCache,
+    report_type: str,
+    nd: str,
+    date_debut: datetime,
+    date_fin: datetime,
+    partition: str | None,
+    arraysize: int | None,
+    prefetchrows: int | None,
+) -> Iterator[tuple]:
+    """
+    Jours servis depuis le cache local ; seuls les jours absents ou encore
+    ouverts sont lus depuis Oracle (une lecture par suite de jours
+    consécutifs), puis enregistrés.
+
+    Les jours sont parcourus dans l'ordre du rapport et restitués au fil de
+    l'eau : un jour en cache est chargé au moment de le restituer, les
+    lignes lues depuis Oracle sont transmises dès leur lecture. La mémoire
+    reste bornée par un jour de lignes.
+    """
+    first, last = date_debut.date(), date_fin.date()
+    days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+    # Ordre du rapport : jours croissants, ou décroissants (UP)
+    if get_report(report_type).descending:
+        days.reverse()
+
+    version = _definition_version(report_type)
+    cached = cache.valid_days(report_type, nd, partition, version, days)
+
+    logger.info(
+        f"Cache résultats {report_type}/{nd} : {len(cached)} jour(s) en cache, "
+        f"{len(days) - len(cached)} à lire depuis Oracle"
+    )
+
+    def _fetch(run: list[date]) -> Iterator[tuple]:
+        return _iter_and_store(
+            cache, version, report_type, nd, run, partition, arraysize, prefetchrows
+        )
+
+    run: list[date] = []
+    for day in days:
+        if day not in cached:
+            run.append(day)
+            continue
+
+        if run:
+            yield from _fetch(run)
+            run = []
+
+        rows = cache.get(report_type, nd, partition, version, day)
+        if rows is None:
+            # Expiré depuis `valid_days` (jour courant) : relu
+            yield from _fetch([day])
+        else:
+            yield from rows
+
+    if run:
+        yield from _fetch(run)
+
+
+def _iter_and_store(
+    cache: ResultCache,
+    version: str,
+    report_type: str,
+    nd: str,
+    run: list[date],
+    partition: str | None,
+    arraysize: int | None,
+    prefetchrows: int | None,
+) -> Iterator[tuple]:
+    """
+    Lit depuis Oracle une suite de jours consécutifs (dans l'ordre du
+    rapport) en transmettant les lignes au fil de la lecture ; chaque jour
+    est enregistré dans le cache dès que le suivant commence (jours vides
+    compris). Un jour dont la lecture est interrompue n'est pas enregistré.
+    """
+    date_idx = get_report_schema(report_type).index["DATE_TRANS"]
+
+    rows = _iter_oracle(
+        report_type, nd,
+        datetime.combine(min(run), dt_time.min),
+        datetime.combine(max(run), dt_time(23, 59, 59)),
+        partition, arraysize, prefetchrows,
+    )
+
+    remaining = iter(run)
+    day, day_rows = next(remaining), []
+
+    for row in rows:
+        row_day = row[date_idx].date()
+        while row_day != day:
+            cache.put(report_type, nd, partition, version, day, day_rows)
+            day, day_rows = next(remaining, None), []
+            if day is None:
+                raise RuntimeError(
+                    f"Cache résultats {report_type}/{nd} : ligne du {row_day} "
+                    f"hors de l'ordre du rapport"
+                )
+        day_rows.append(row)
+        yield row
+
+    cache.put(report_type, nd, partition, version, day, day_rows)
+    for day in remaining:
+        cache.put(report_type, nd, partition, version, day, [])
+
+
+def _execute_all(
+    report_type: str,
+    queries: list[tuple[str, dict]],
+    arraysize: int | None = None,
+    prefetchrows: int | None = None,
+    strategy: str = "pivot",
+) -> Iterator[tuple]:
+    """
+    Enchaîne les requêtes (une par partition) dans l'ordre donné.
+
+    Avec ORACLE_PARTITION_WORKERS > 1, les partitions sont lues en parallèle
+    (une connexion du pool chacune) puis restituées dans l'ordre ; chaque
+    partition est alors matérialisée en mémoire.
+    """
+    workers = min(int(os.getenv("ORACLE_PARTITION_WORKERS", 1)), len(queries))
+    if _pool is not None:
+        # Pas plus de lectures simultanées que de connexions du pool
+        workers = min(workers, _pool.max)
+
+    if workers <= 1:
+        for query, params in queries:
+            yield from _execute(report_type, query, params, arraysize, prefetchrows, strategy)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                lambda q, p: list(
+                    _execute(report_type, q, p, arraysize, prefetchrows, strategy)
+                ),
+                query,
+                params,
+            )
+            for query, params in queries
+        ]
+        for future in futures:
+            yield from future.result()
+
+
+def _execute(
+    report_type: str,
+    query: str,
+    params: dict,
+    arraysize: int | None = None,
+    prefetchrows: int | None = None,
+    strategy: str = "pivot",
+) -> Iterator[tuple]:
+    """
+    Exécute une requête de rapport sur une connexion du pool et itère sur
+    ses lignes par lots `cursor.fetchmany`.
+
+    En stratégie two_phase, la requête ne lit que TRANS_REPORT ; les
+    colonnes TRANS_DATA sont ajoutées par `iter_two_phase`.
+    """
+    arraysize = arraysize or int(os.getenv("ORACLE_ARRAYSIZE", 1000))
+    prefetchrows = prefetchrows or int(os.getenv("ORACLE_PREFETCHROWS", arraysize))
+
+    schema = get_report_schema(report_type)
+
+    logger.debug("=== Requête SQL exécutée ===")
+    logger.debug(query)
+
+    count = 0
+
     try:
         logger.debug("Requête Oracle en cours")
-        conn = get_oracle_connection()
-        cursor = conn.cursor()
-        
-        # Construction de la requête selon le type de rapport
-        if report_type.lower() == "remit":
-            query = """
-        SELECT
-            tr.MODIFIED AS DATE_TRANS,
-            tr.TRANSID AS REFMVOLA,
-            tr.TRANS_TYPE,
-            tr.INITIATOR,
-            tr.AMOUNT,
-            tr.DEBTOR,
-            tr.CREDITOR,
-            tr.STATE,
-            tr.C_PRE_BAL AS BALANCE_AVANT,
-            tr.C_POST_BAL AS BALANCE_APRES,
-            
-            MAX(CASE WHEN td.TD_KEY = 'operationType' THEN td.VALUE END) AS OPERATION_TYPE,
-            MAX(CASE WHEN td.TD_KEY = 'descriptionText' THEN td.VALUE END) AS DESCRIPTION,
-            MAX(CASE WHEN td.TD_KEY = 'partnerID' THEN td.VALUE END) AS PARTNER_ID,
-            MAX(CASE WHEN td.TD_KEY = 'partnerWalletId' THEN td.VALUE END) AS PARTNER_WALLET_ID,
-            MAX(CASE WHEN td.TD_KEY = 'partnerWorkflowID' THEN td.VALUE END) AS PARTNER_WORKFLOW_ID,
-            MAX(CASE WHEN td.TD_KEY = 'sendingPartnerName' THEN td.VALUE END) AS SENDING_PARTNER,
-            MAX(CASE WHEN td.TD_KEY = 'receiverFirstname' THEN td.VALUE END) AS RECEIVER_FIRSTNAME,
-            MAX(CASE WHEN td.TD_KEY = 'receiverName' THEN td.VALUE END) AS RECEIVER_NAME,
-            MAX(CASE WHEN td.TD_KEY = 'receiverAmount' THEN td.VALUE END) AS RECEIVER_AMOUNT,
-            MAX(CASE WHEN td.TD_KEY = 'receiverCurrency' THEN td.VALUE END) AS RECEIVER_CURRENCY,
-            MAX(CASE WHEN td.TD_KEY = 'senderFirstname' THEN td.VALUE END) AS SENDER_FIRSTNAME,
-            MAX(CASE WHEN td.TD_KEY = 'senderName' THEN td.VALUE END) AS SENDER_NAME,
-            MAX(CASE WHEN td.TD_KEY = 'senderAccountID' THEN td.VALUE END) AS SENDER_ACCOUNT_ID,
-            MAX(CASE WHEN td.TD_KEY = 'senderAmount' THEN td.VALUE END) AS SENDER_AMOUNT,
-            MAX(CASE WHEN td.TD_KEY = 'senderCurrency' THEN td.VALUE END) AS SENDER_CURRENCY,
-            MAX(CASE WHEN td.TD_KEY = 'senderCountry' THEN td.VALUE END) AS SENDER_COUNTRY,
-            MAX(CASE WHEN td.TD_KEY = 'trans_ext_reference' THEN td.VALUE END) AS EXT_REFERENCE
-            
-        FROM MCOMMADM.TRANS_REPORT{partition_clause} tr
-        LEFT JOIN MCOMMADM.TRANS_DATA td ON td.TRANSID = tr.TRANSID
-        WHERE 
-            (tr.INITIATOR = :nd OR tr.CREDITOR = :nd OR tr.DEBTOR = :nd)
-            AND tr.TRANS_TYPE NOT IN (
-                'login','balance','logout','create_batch','report','trans_query_ext'
-            )
-            AND tr.MODIFIED BETWEEN :date_debut AND :date_fin
-        GROUP BY 
-            tr.MODIFIED,
-            tr.TRANSID,
-            tr.TRANS_TYPE,
-            tr.INITIATOR,
-            tr.AMOUNT,
-            tr.DEBTOR,
-            tr.CREDITOR,
-            tr.STATE,
-            tr.C_PRE_BAL,
-            tr.C_POST_BAL
-        ORDER BY tr.MODIFIED ASC
-            """
-            
-            # Ajouter la partition si spécifiée
-            partition_clause = f" PARTITION ({partition})" if partition else ""
-            query = query.replace("{partition_clause}", partition_clause)
-            
-            params = {
-                'nd': nd,
-                'date_debut': date_debut,
-                'date_fin': date_fin
-            }
-            
-        elif report_type.lower() == "up":
-            query = """
-                    SELECT
-                    tr.MODIFIED AS DATE_TRANS,
-                    tr.TRANSID AS N_TRANSACTION,
-                    tr.INITIATOR,
-                    tr.TRANS_TYPE,
-                    tr.CHANNEL,
-                    tr.STATE,
-                    CASE WHEN tr.WALLET = 'EWallet' THEN 'M_Vola' ELSE tr.WALLET END AS COMPTE,
-                    tr.AMOUNT,
-                    tr.RRP,
-                    tr.DEBTOR,
-                    tr.CREDITOR,
-                    tr.D_PRE_BAL AS DE_BALANCE_AVANT,
-                    tr.D_POST_BAL AS DE_BALANCE_APRES,
-                    tr.C_PRE_BAL AS VERS_BALANCE_AVANT,
-                    tr.C_POST_BAL AS VERS_BALANCE_APRES,
-                    tr.DETAILS1,
-                    tr.DETAILS2
-                FROM MCOMMADM.TRANS_REPORT {partition_clause} tr
-                WHERE
-                    (tr.INITIATOR = :nd OR tr.DEBTOR = :nd OR tr.CREDITOR = :nd)
-                    AND tr.TRANS_TYPE NOT IN (
-                        'login','balance','logout','create_batch','report','trans_query_ext'
-                    )
-                    AND tr.MODIFIED BETWEEN :date_debut AND :date_fin
-                ORDER BY tr.MODIFIED DESC
-            """
-            
-            partition_clause = f" PARTITION ({partition})" if partition else ""
-            query = query.replace("{partition_clause}", partition_clause)
-            
-            params = {
-                'nd': nd,
-                'date_debut': date_debut,
-                'date_fin': date_fin
-            }
-            
-        
-        else:
-            raise ValueError(f"Type de rapport non supporté: {report_type}")
-        
-        logger.debug("=== Requête SQL exécutée ===")
-        logger.debug(query)
-        
-        cursor.execute(query, params)
-        
-        # Récupérer les noms des colonnes
-        columns = [col[0] for col in cursor.description]
-        
-        # Convertir les résultats en liste de dictionnaires
-        results = []
-        for row in cursor:
-            results.append(dict(zip(columns, row)))
-        
-        logger.info(f"Requête réussie: {len(results)} lignes récupérées")
-        
-        return results
-        
+        with _acquire_connection() as conn, conn.cursor() as cursor:
+            cursor.arraysize = arraysize
+            cursor.prefetchrows = prefetchrows
+
+            cursor.execute(query, params)
+
+            columns = [col[0] for col in cursor.description]
+            if strategy == "two_phase":
+                columns += TRANS_DATA_KEYS.values()
+
+            # Les colonnes doivent correspondre au schéma partagé
+            if ReportSchema(columns) != schema:
+                raise RuntimeError(f"Colonnes inattendues pour {report_type}: {columns}")
+
+            if strategy == "two_phase":
+                transid_idx = columns.index(get_report(report_type).transid_col)
+                for row in iter_two_phase(conn, cursor, transid_idx):
+                    count += 1
+                    yield row
+            else:
+                while True:
+                    batch = cursor.fetchmany()
+                    if not batch:
+                        break
+                    count += len(batch)
+                    yield from batch
+
+        logger.info(f"Requête réussie: {count} lignes récupérées")
+
     except oracledb.DatabaseError as e:
         logger.error(f"Erreur requête Oracle: {e}")
         raise
     except Exception as e:
         logger.error(f"Erreur inattendue: {e}")
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
-            logger.debug("Connexion Oracle fermée")
\ No newline at end of file
+
+
+def fetch_reports(
+    report_type: str,
+    nd: str,
+    date_debut: datetime,
+    date_fin: datetime,
+    partition: str | None = None,
+) -> list[tuple]:
+    """
+    Récupère les rapports depuis Oracle selon les critères.
+
+    Voir `iter_reports` pour la version en flux (mémoire bornée).
+    
+    Args:
+        report_type: Type de rapport ('remit', 'up', 'down', etc.)
+        nd: Numéro de téléphone
+        date_debut: Date de début
+        date_fin: Date de fin
+        partition: Nom de la partition Oracle (optionnel)
+    
+    Returns:
+        Liste de tuples, ordonnés selon `get_report_schema(report_type)`
+    """
+    return list(iter_reports(
+        report_type=report_type,
+        nd=nd,
+        date_debut=date_debut,
+        date_fin=date_fin,
+        partition=partition,
+    ))
+
+
+def fetch_reports_bulk(
+    report_type: str,
+    nds: list[str],
+    date_debut: datetime,
+    date_fin: datetime,
+    partition: str | None = None,
+    batch_size: int | None = None,
+) -> dict[str, list[tuple]]:
+    """
+    Récupère les rapports de plusieurs comptes sur la même plage de dates :
+    la partition est parcourue une fois par lot de comptes (liste IN) au lieu
+    d'une fois par compte, puis chaque ligne est redistribuée à chacun des
+    comptes qu'elle concerne (initiateur, débiteur ou créditeur).
+
+    Le cache de résultats (REPORT_CACHE_DIR) n'est pas utilisé ici.
+
+    Les lots sont complétés à `batch_size` binds (ORACLE_BULK_BATCH, défaut
+    100, 1000 maximum) pour garder un texte SQL identique d'un lot à l'autre
+    (cache de requêtes du driver).
+
+    Returns:
+        Dictionnaire compte → liste de tuples, dans l'ordre de la requête
+    """
+    batch_size = min(batch_size or int(os.getenv("ORACLE_BULK_BATCH", 100)), 1000)
+
+    schema = get_report_schema(report_type)
+    account_cols = [schema.index[c] for c in ("INITIATOR", "DEBTOR", "CREDITOR")]
+
+    accounts = list(dict.fromkeys(nds))
+    results: dict[str, list[tuple]] = {nd: [] for nd in accounts}
+
+    logger.debug(
+        f"fetch_reports_bulk: {report_type}, {len(accounts)} compte(s), "
+        f"{date_debut} → {date_fin}, partition={partition}"
+    )
+
+    strategy = fetch_strategy(report_type)
+
+    partitions = resolve_partitions(report_type, partition, date_debut, date_fin)
+
+    for start in range(0, len(accounts), batch_size):
+        batch = accounts[start:start + batch_size]
+        padded = batch + [batch[-1]] * (batch_size - len(batch))
+        wanted = set(batch)
+
+        queries = [
+            _build_query(report_type, padded, date_debut, date_fin, part, strategy)
+            for part in partitions
+        ]
+
+        for row in _execute_all(report_type, queries, strategy=strategy):
+            # Une ligne peut concerner plusieurs comptes du lot
+            for nd in {row[i] for i in account_cols} & wanted:
+                results[nd].append(row)
+
+    return results
\ No newline at end of file
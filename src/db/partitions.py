@@ -0,0 +1,85 @@
+import os
+import re
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger('send_report')
+
+
+# ============================================================
+# PARTITIONS COUVRANT UNE PLAGE DE DATES
+# ============================================================
+
+# ORACLE_PARTITIONS :
+#   vide      → pas de découpage (partition du job, sinon table entière)
+#   lookup    → bornes lues une fois par run dans ALL_TAB_PARTITIONS
+#   <format>  → noms dérivés des dates, format strftime (ex. P%Y%m)
+PARTITION_LOOKUP = "lookup"
+
+# Borne haute d'une partition par plage : TO_DATE(' 2026-02-01 00:00:00', …)
+_HIGH_VALUE_DATE = re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+
+
+def partition_scheme() -> str | None:
+    """Découpage configuré (ORACLE_PARTITIONS), None si désactivé."""
+    return os.getenv("ORACLE_PARTITIONS", "").strip() or None
+
+
+def partitions_from_format(
+    fmt: str,
+    date_debut: datetime,
+    date_fin: datetime,
+) -> list[str]:
+    """
+    Noms des partitions couvrant la plage, dans l'ordre chronologique.
+
+    Le pas suit le format : journalier s'il contient %d, mensuel s'il
+    contient %m, annuel sinon.
+    """
+    names = []
+    day = date_debut.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    while day <= date_fin:
+        name = day.strftime(fmt)
+        if name not in names:
+            names.append(name)
+
+        if "%d" in fmt:
+            day += timedelta(days=1)
+        elif "%m" in fmt:
+            day = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+        else:
+            day = day.replace(year=day.year + 1, month=1, day=1)
+
+    return names
+
+
+def parse_high_value(high_value: str) -> datetime:
+    """Borne haute (exclue) d'une partition ; MAXVALUE → datetime.max."""
+    match = _HIGH_VALUE_DATE.search(high_value or "")
+    if not match:
+        return datetime.max
+    return datetime.fromisoformat(match.group(1))
+
+
+def partitions_from_bounds(
+    bounds: list[tuple[str, datetime]],
+    date_debut: datetime,
+    date_fin: datetime,
+) -> list[str]:
+    """
+    Partitions dont l'intervalle [borne précédente, borne haute) recoupe
+    la plage, dans l'ordre chronologique.
+
+    Args:
+        bounds: (nom, borne haute) triés par PARTITION_POSITION
+    """
+    names = []
+    low = datetime.min
+
+    for name, high in bounds:
+        if high > date_debut and low <= date_fin:
+            names.append(name)
+        low = high
+
+    return names
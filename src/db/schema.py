@@ -0,0 +1,44 @@
+class ReportSchema:
+    """
+    Schéma de colonnes partagé par toutes les lignes d'un résultat.
+
+    Les lignes sont de simples tuples (tels que retournés par le driver) ;
+    les noms de colonnes ne sont stockés qu'une fois, ici.
+    """
+
+    __slots__ = ("columns", "index")
+
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+
+    @classmethod
+    def from_description(cls, description) -> "ReportSchema":
+        """Construit le schéma depuis `cursor.description` (DB-API)."""
+        return cls(col[0] for col in description)
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __contains__(self, name) -> bool:
+        return name in self.index
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ReportSchema) and self.columns == other.columns
+
+    def __hash__(self) -> int:
+        return hash(self.columns)
+
+    def __repr__(self) -> str:
+        return f"ReportSchema({list(self.columns)!r})"
+
+    def as_dict(self, row) -> dict:
+        """Vue dictionnaire d'une ligne (debug, compatibilité)."""
+        return dict(zip(self.columns, row))
+
+    def to_row(self, mapping: dict, default="") -> tuple:
+        """Convertit une ligne dictionnaire en tuple ordonné selon le schéma."""
+        return tuple(mapping.get(name, default) for name in self.columns)
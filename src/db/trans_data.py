@@ -0,0 +1,141 @@
+import os
+import logging
+from contextlib import closing
+from typing import Iterator
+
+from config.reports import get_report
+
+logger = logging.getLogger('send_report')
+
+
+# ============================================================
+# CLÉS TRANS_DATA DU RAPPORT REMIT
+# ============================================================
+
+# TD_KEY → colonne du rapport, dans l'ordre des colonnes REMIT
+TRANS_DATA_KEYS = {
+    "operationType": "OPERATION_TYPE",
+    "descriptionText": "DESCRIPTION",
+    "partnerID": "PARTNER_ID",
+    "partnerWalletId": "PARTNER_WALLET_ID",
+    "partnerWorkflowID": "PARTNER_WORKFLOW_ID",
+    "sendingPartnerName": "SENDING_PARTNER",
+    "receiverFirstname": "RECEIVER_FIRSTNAME",
+    "receiverName": "RECEIVER_NAME",
+    "receiverAmount": "RECEIVER_AMOUNT",
+    "receiverCurrency": "RECEIVER_CURRENCY",
+    "senderFirstname": "SENDER_FIRSTNAME",
+    "senderName": "SENDER_NAME",
+    "senderAccountID": "SENDER_ACCOUNT_ID",
+    "senderAmount": "SENDER_AMOUNT",
+    "senderCurrency": "SENDER_CURRENCY",
+    "senderCountry": "SENDER_COUNTRY",
+    "trans_ext_reference": "EXT_REFERENCE",
+}
+
+# Stratégies de lecture des colonnes TRANS_DATA
+#   pivot     : LEFT JOIN + MAX(CASE …) + GROUP BY côté Oracle
+#   two_phase : lignes TRANS_REPORT d'abord, puis clés TRANS_DATA par lots
+#               de TRANSID, pivot en Python
+FETCH_STRATEGIES = {"pivot", "two_phase"}
+
+
+def fetch_strategy(report_type: str) -> str:
+    """
+    Stratégie de lecture pour un type de rapport : variable
+    `<TYPE>_FETCH_STRATEGY` (ex. REMIT_FETCH_STRATEGY=two_phase), défaut pivot.
+
+    Sans objet (pivot) pour les rapports qui ne lisent pas TRANS_DATA.
+    """
+    if not get_report(report_type).trans_data:
+        return "pivot"
+
+    strategy = os.getenv(f"{report_type.upper()}_FETCH_STRATEGY", "pivot").lower()
+    if strategy not in FETCH_STRATEGIES:
+        raise ValueError(
+            f"{report_type.upper()}_FETCH_STRATEGY invalide: {strategy} "
+            f"(attendu: {', '.join(sorted(FETCH_STRATEGIES))})"
+        )
+    return strategy
+
+
+def pivot_columns_sql() -> str:
+    """Colonnes MAX(CASE …) de la stratégie pivot."""
+    return ",\n".join(
+        f"        MAX(CASE WHEN td.TD_KEY = '{key}' THEN td.VALUE END) AS {column}"
+        for key, column in TRANS_DATA_KEYS.items()
+    )
+
+
+def _trans_data_query(batch_size: int) -> str:
+    """
+    Requête de la phase 2 : texte identique pour tous les lots (binds
+    :t0 … :tN complétés), donc analysé une seule fois par le serveur.
+    """
+    ids = ", ".join(f":t{i}" for i in range(batch_size))
+    keys = ", ".join(f"'{key}'" for key in TRANS_DATA_KEYS)
+    return f"""
+    SELECT td.TRANSID, td.TD_KEY, td.VALUE
+    FROM MCOMMADM.TRANS_DATA td
+    WHERE td.TRANSID IN ({ids})
+        AND td.TD_KEY IN ({keys})
+    """
+
+
+# ============================================================
+# LECTURE EN DEUX PHASES
+# ============================================================
+
+def iter_two_phase(
+    conn,
+    cursor,
+    transid_idx: int,
+    batch_size: int | None = None,
+) -> Iterator[tuple]:
+    """
+    Complète les lignes TRANS_REPORT d'un curseur déjà exécuté avec les
+    colonnes TRANS_DATA, lues pour chaque lot de TRANSID sur un second
+    curseur de la même connexion.
+
+    Fonctionne avec toute connexion DB-API acceptant les binds nommés
+    (oracledb, sqlite3) ; même sémantique que MAX(CASE …) : la plus grande
+    valeur non nulle par clé, None si la clé est absente.
+
+    Args:
+        conn: Connexion DB-API
+        cursor: Curseur de la phase 1 (colonnes TRANS_REPORT, ordre final)
+        transid_idx: Position de TRANSID dans les lignes de la phase 1
+        batch_size: TRANSID par requête TRANS_DATA (défaut TRANS_DATA_BATCH
+            ou 500, 1000 maximum pour une liste IN Oracle)
+
+    Yields:
+        Ligne TRANS_REPORT suivie des colonnes de TRANS_DATA_KEYS
+    """
+    batch_size = min(batch_size or int(os.getenv("TRANS_DATA_BATCH", 500)), 1000)
+
+    key_pos = {key: i for i, key in enumerate(TRANS_DATA_KEYS)}
+    empty = (None,) * len(key_pos)
+    query = _trans_data_query(batch_size)
+
+    with closing(conn.cursor()) as td_cursor:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+
+            ids = list(dict.fromkeys(row[transid_idx] for row in rows))
+            ids += [ids[-1]] * (batch_size - len(ids))
+            td_cursor.execute(query, {f"t{i}": value for i, value in enumerate(ids)})
+
+            values: dict = {}
+            for transid, key, value in td_cursor.fetchall():
+                if value is None:
+                    continue
+                current = values.setdefault(transid, [None] * len(key_pos))
+                pos = key_pos[key]
+                if current[pos] is None or value > current[pos]:
+                    current[pos] = value
+
+            for row in rows:
+                extra = values.get(row[transid_idx])
+                yield row + (tuple(extra) if extra else empty)
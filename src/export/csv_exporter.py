@@ -1,15 +1,274 @@
+import io
+import os
 import csv
+import gzip
 import logging
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import chain, islice
+from typing import Iterable, Iterator
 
+from db.schema import ReportSchema
+
+
+# ============================================================
+# FORMATS DE SORTIE
+# ============================================================
+
+# CSV_FORMAT : csv (défaut), gzip (CSV compressé) ou parquet (pyarrow requis)
+OUTPUT_FORMATS = {"csv": ".csv", "gzip": ".csv.gz", "parquet": ".parquet"}
+
+# Lignes passées à chaque writerows, tampon d'écriture du fichier
+_BATCH_ROWS = 10_000
+_BUFFER_BYTES = 1024 * 1024
+
+
+def _output_format(output_format: str | None = None) -> str:
+    output_format = (output_format or os.getenv("CSV_FORMAT") or "csv").lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"CSV_FORMAT inconnu : {output_format}")
+    return output_format
+
+
+def _batches(rows: Iterable, size: int = _BATCH_ROWS) -> Iterator[list]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+@contextmanager
+def _open_text(filepath: Path, output_format: str):
+    """Fichier texte UTF-8 à grand tampon, compressé en gzip si demandé."""
+    if output_format != "gzip":
+        with open(
+            filepath, mode="w", newline="", encoding="utf-8", buffering=_BUFFER_BYTES
+        ) as f:
+            yield f
+        return
+
+    # mtime=0 : même contenu → même fichier (empreintes du journal de run)
+    level = int(os.getenv("CSV_GZIP_LEVEL", 1))
+    with open(filepath, "wb", buffering=_BUFFER_BYTES) as raw, \
+            gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=level, mtime=0) as gz, \
+            io.TextIOWrapper(gz, encoding="utf-8", newline="") as f:
+        yield f
+
+
+def _open_writer(f, first_row, schema: ReportSchema | None):
+    """
+    Writer CSV adapté à la représentation des lignes :
+    tuples + schéma partagé, ou dictionnaires.
+    """
+    if schema is not None:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(schema.columns)
+        return writer
+
+    writer = csv.DictWriter(
+        f,
+        fieldnames=first_row.keys(),
+        delimiter=";"
+    )
+    writer.writeheader()
+    return writer
+
+
+def _write_csv(filepath: Path, output_format: str, first, rows, schema) -> int:
+    """
+    Écrit les lignes par lots (`writerows`) : datetime / Decimal sont
+    convertis par le module csv lui-même, plus vite qu'un formatage Python.
+    """
+    count = 0
+    with _open_text(filepath, output_format) as f:
+        writer = _open_writer(f, first, schema)
+        for batch in _batches(chain([first], rows)):
+            writer.writerows(batch)
+            count += len(batch)
+    return count
+
+
+def _arrow_type(pa, values):
+    """
+    Type Arrow d'une colonne, d'après les types Python de ses valeurs
+    (null si toutes sont nulles).
+    """
+    kinds = {type(v) for v in values}
+    kinds.discard(type(None))
+
+    if not kinds:
+        return pa.null()
+    if all(issubclass(k, date) for k in kinds):
+        if any(issubclass(k, datetime) for k in kinds):
+            return pa.timestamp("us")
+        return pa.date32()
+    if all(issubclass(k, bool) for k in kinds):
+        return pa.bool_()
+    if all(issubclass(k, int) for k in kinds):
+        return pa.int64()
+    if all(issubclass(k, (int, float)) for k in kinds):
+        return pa.float64()
+    if all(issubclass(k, (int, float, Decimal)) for k in kinds):
+        return pa.decimal128(38, 10)
+    return pa.string()
+
+
+def _merge_type(pa, current, new):
+    """Type couvrant les valeurs déjà écrites et celles d'un nouveau lot."""
+    if current == new or pa.types.is_null(new):
+        return current
+    if pa.types.is_null(current):
+        return new
+
+    types = {current, new}
+    if types == {pa.int64(), pa.float64()}:
+        return pa.float64()
+    if pa.decimal128(38, 10) in types and types <= {
+        pa.int64(), pa.float64(), pa.decimal128(38, 10)
+    }:
+        return pa.decimal128(38, 10)
+    if types == {pa.date32(), pa.timestamp("us")}:
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _arrow_column(pa, values: tuple, arrow_type):
+    """
+    Colonne Arrow du type donné, None si une valeur ne s'y convertit pas
+    sans perte (ex. Decimal à plus de 10 décimales).
+    """
+    if pa.types.is_string(arrow_type):
+        try:
+            return pa.array(values, type=arrow_type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Colonne texte contenant d'autres types (ex. montant numérique)
+            values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+    elif pa.types.is_decimal(arrow_type):
+        values = [Decimal(str(v)) if isinstance(v, float) else v for v in values]
+    elif pa.types.is_timestamp(arrow_type):
+        values = [
+            datetime.combine(v, datetime.min.time())
+            if isinstance(v, date) and not isinstance(v, datetime) else v
+            for v in values
+        ]
+
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+
+
+def _rewrite_parquet(pq, writer, filepath: Path, arrow_schema):
+    """
+    Réécrit les groupes de lignes déjà produits avec les types élargis et
+    retourne le nouveau writer. Rare : seulement quand le type d'une
+    colonne change en cours de flux (entiers puis décimaux, colonne vide
+    dans les premiers lots…).
+    """
+    writer.close()
+    previous = filepath.with_name(f".{filepath.name}.prev")
+    os.replace(filepath, previous)
+
+    writer = pq.ParquetWriter(str(filepath), arrow_schema, compression="zstd")
+    try:
+        written = pq.ParquetFile(str(previous))
+        for i in range(written.num_row_groups):
+            # Élargissements uniquement (int → float, null → type…)
+            writer.write_table(written.read_row_group(i).cast(arrow_schema, safe=False))
+    except BaseException:
+        writer.close()
+        raise
+    finally:
+        previous.unlink(missing_ok=True)
+
+    return writer
+
+
+def _write_parquet(filepath: Path, first, rows, schema: ReportSchema | None) -> int:
+    """
+    Écrit les lignes en Parquet (zstd), un groupe de lignes par lot.
+
+    Les types de colonnes sont déduits du premier lot puis élargis si un
+    lot suivant l'exige (colonne encore vide, entiers puis décimaux…) :
+    le fichier déjà écrit est alors réécrit avec le nouveau schéma. Une
+    valeur qui ne se convertit pas sans perte bascule sa colonne en texte.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError(
+            "CSV_FORMAT=parquet nécessite le paquet pyarrow (pip install pyarrow)"
+        ) from None
+
+    if schema is None:
+        raise ValueError("Sortie Parquet : lignes tuples et schéma requis")
+
+    batches = _batches(chain([first], rows))
+    head = next(batches)
+    types = [_arrow_type(pa, values) for values in zip(*head)]
+
+    count = 0
+    writer = None
+    try:
+        for batch in chain([head], batches):
+            arrays, batch_types = [], []
+            for values, arrow_type in zip(zip(*batch), types):
+                # Types du lot vérifiés à chaque fois : pa.array convertirait
+                # sans erreur des décimaux en entiers (troncature). Une colonne
+                # texte le reste.
+                if not pa.types.is_string(arrow_type):
+                    arrow_type = _merge_type(pa, arrow_type, _arrow_type(pa, values))
+                array = _arrow_column(pa, values, arrow_type)
+                if array is None:
+                    arrow_type = pa.string()
+                    array = _arrow_column(pa, values, arrow_type)
+                arrays.append(array)
+                batch_types.append(arrow_type)
+
+            arrow_schema = pa.schema(list(zip(schema.columns, batch_types)))
+            if writer is None:
+                writer = pq.ParquetWriter(str(filepath), arrow_schema, compression="zstd")
+            elif batch_types != types:
+                writer = _rewrite_parquet(pq, writer, filepath, arrow_schema)
+            types = batch_types
+
+            writer.write_table(pa.Table.from_arrays(arrays, schema=arrow_schema))
+            count += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return count
+
+
+def _write(filepath: Path, output_format: str, first, rows, schema) -> int:
+    if output_format == "parquet":
+        return _write_parquet(filepath, first, rows, schema)
+    return _write_csv(filepath, output_format, first, rows, schema)
+
+
+# ============================================================
+# EXPORT
+# ============================================================
 
 def generate_csv(
-    data: list[dict],
+    data: list[dict] | list[tuple],
     filename_prefix: str,
     report_type: str,
     output_base_dir: str = "outputs",
+    schema: ReportSchema | None = None,
+    output_format: str | None = None,
 ) -> Path:
+    """
+    Écrit les lignes dans outputs/<report_type>/<prefix>_<timestamp>.csv.
+
+    Avec `schema`, les lignes sont des tuples ordonnés selon ce schéma ;
+    sinon des dictionnaires. `output_format` (défaut CSV_FORMAT) : csv,
+    gzip (`.csv.gz`) ou parquet (`.parquet`, tuples + schéma).
+    """
+    output_format = _output_format(output_format)
     logger = logging.getLogger("send_report")
 
     if not data:
@@ -23,22 +282,59 @@ def generate_csv(
     logger.debug(f"Dossier de sortie CSV : {output_dir.resolve()}")
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{filename_prefix}_{timestamp}.csv"
+    filename = f"{filename_prefix}_{timestamp}{OUTPUT_FORMATS[output_format]}"
     filepath = output_dir / filename
 
     logger.info(
         f"Génération CSV en cours | fichier={filename} | lignes={len(data)}"
     )
 
-    with open(filepath, mode="w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=data[0].keys(),
-            delimiter=";"
-        )
-        writer.writeheader()
-        writer.writerows(data)
+    _write(filepath, output_format, data[0], islice(data, 1, None), schema)
 
     logger.info(f"CSV généré avec succès : {filepath.resolve()}")
 
     return filepath
+
+
+def generate_csv_stream(
+    rows: Iterable[dict] | Iterable[tuple],
+    filename_prefix: str,
+    report_type: str,
+    output_base_dir: str = "outputs",
+    schema: ReportSchema | None = None,
+    output_format: str | None = None,
+) -> tuple[Path, int]:
+    """
+    Variante de `generate_csv` qui écrit les lignes au fil de l'itération
+    (ex. `db.oracle.iter_reports`) : la mémoire reste bornée quel que soit
+    le nombre de lignes.
+
+    Retourne le chemin du CSV et le nombre de lignes écrites.
+    """
+    logger = logging.getLogger("send_report")
+    output_format = _output_format(output_format)
+
+    rows = iter(rows)
+    first = next(rows, None)
+
+    if first is None:
+        logger.warning("Aucune donnée à exporter → CSV non généré")
+        raise ValueError("Aucune donnée à exporter")
+
+    # outputs/<report_type>/
+    output_dir = Path(output_base_dir) / report_type
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    logger.debug(f"Dossier de sortie CSV : {output_dir.resolve()}")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"{filename_prefix}_{timestamp}{OUTPUT_FORMATS[output_format]}"
+    filepath = output_dir / filename
+
+    logger.info(f"Génération CSV en cours (flux) | fichier={filename}")
+
+    count = _write(filepath, output_format, first, rows, schema)
+
+    logger.info(f"CSV généré avec succès : {filepath.resolve()} | lignes={count}")
+
+    return filepath, count
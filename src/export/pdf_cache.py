@@ -0,0 +1,132 @@
+import os
+import time
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+
+logger = logging.getLogger("send_report")
+
+
+# ============================================================
+# CACHE DES PDFs JOURNALIERS (ADRESSÉ PAR CONTENU)
+# ============================================================
+
+def pdf_cache_dir() -> Path | None:
+    """Répertoire du cache (PDF_CACHE_DIR), None si désactivé."""
+    cache_dir = os.getenv("PDF_CACHE_DIR")
+    return Path(cache_dir) if cache_dir else None
+
+
+def pdf_cache_key(rows, *parts) -> str:
+    """
+    Empreinte SHA-256 des lignes d'un jour et des paramètres de rendu
+    (type de rapport, compte, version du style, mise en page…).
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    for row in rows:
+        digest.update(repr(row).encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+def _entry(cache_dir: Path, key: str) -> Path:
+    return cache_dir / key[:2] / f"{key}.pdf"
+
+
+def _link_or_copy(src: Path, dst: Path):
+    """Lien physique si possible (même disque), copie sinon."""
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def link_cached_pdf(cache_dir: Path, key: str, target: Path) -> bool:
+    """Place le PDF en cache à `target` (fichier conservé) ; False si absent."""
+    entry = _entry(cache_dir, key)
+    if not entry.exists():
+        return False
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    _link_or_copy(entry, target)
+    # Date d'accès pour l'éviction (les plus anciennement utilisés d'abord)
+    os.utime(entry)
+    return True
+
+
+def read_cached_pdf(cache_dir: Path, key: str) -> bytes | None:
+    """Contenu du PDF en cache, None si absent."""
+    entry = _entry(cache_dir, key)
+    try:
+        data = entry.read_bytes()
+    except FileNotFoundError:
+        return None
+    os.utime(entry)
+    return data
+
+
+def store_pdf(cache_dir: Path, key: str, data: bytes):
+    """Ajoute un PDF fraîchement rendu au cache."""
+    entry = _entry(cache_dir, key)
+    if entry.exists():
+        return
+    tmp = entry.with_name(f".{entry.name}.{os.getpid()}.tmp")
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(data)
+        os.replace(tmp, entry)
+    except OSError as e:
+        # Le cache ne doit jamais faire échouer un rendu
+        logger.warning(f"Cache PDF : écriture impossible ({entry}) : {e}")
+        tmp.unlink(missing_ok=True)
+
+
+def evict_pdf_cache(
+    cache_dir: Path | None = None,
+    max_age_days: float | None = None,
+    max_mb: float | None = None,
+):
+    """
+    Supprime les PDFs inutilisés depuis `max_age_days` (PDF_CACHE_MAX_AGE_DAYS,
+    défaut 30), puis les moins récemment utilisés jusqu'à repasser sous
+    `max_mb` (PDF_CACHE_MAX_MB, défaut 1024).
+    """
+    cache_dir = cache_dir or pdf_cache_dir()
+    if cache_dir is None or not cache_dir.exists():
+        return
+
+    max_age = (max_age_days or float(os.getenv("PDF_CACHE_MAX_AGE_DAYS", 30))) * 86400
+    max_bytes = (max_mb or float(os.getenv("PDF_CACHE_MAX_MB", 1024))) * 1024 * 1024
+
+    now = time.time()
+    entries = []
+    removed = 0
+
+    for entry in cache_dir.glob("*/*.pdf"):
+        stat = entry.stat()
+        if now - stat.st_mtime > max_age:
+            entry.unlink(missing_ok=True)
+            removed += 1
+        else:
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+    kept = len(entries)
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        entry.unlink(missing_ok=True)
+        total -= size
+        kept -= 1
+        removed += 1
+
+    logger.info(
+        f"Cache PDF : {removed} fichier(s) supprimé(s), {kept} conservé(s) "
+        f"({total / 1024 / 1024:.1f} Mo)"
+    )
@@ -1,9 +1,13 @@
+import io
 import logging
 import csv
+import time
 import zipfile
 from pathlib import Path
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import os
 
 from reportlab.platypus import (
@@ -12,14 +16,34 @@ from reportlab.platypus import (
     TableStyle,
     Paragraph,
     Spacer,
+    Flowable,
 )
-from reportlab.lib.utils import ImageReader
+from reportlab.lib.utils import ImageReader, simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import mm
 from reportlab.lib.enums import TA_CENTER
 
+from config.reports import (
+    DEFAULT_PDF_COLUMNS,
+    DEFAULT_PDF_FORMATTERS,
+    DEFAULT_PDF_LABELS,
+    DEFAULT_PDF_WIDTHS,
+    get_report,
+)
+from db.schema import ReportSchema
+from export.pdf_cache import (
+    evict_pdf_cache,
+    link_cached_pdf,
+    pdf_cache_dir,
+    pdf_cache_key,
+    read_cached_pdf,
+    store_pdf,
+)
+from utils.metrics import JobMetrics
+
 # ── Colors ─────────────────────────────────────────────────────
 MVOLA_GREEN  = colors.HexColor("#00A651")
 MVOLA_YELLOW = colors.HexColor("#FFD700")
@@ -28,45 +52,77 @@ MVOLA_GREY   = colors.HexColor("#F5F5F5")
 MVOLA_BORDER = colors.HexColor("#DDDDDD")
 TEXT_MUTED   = colors.HexColor("#666666")
 
-SELECTED_COLS = [
-    "DATE_TRANS", "N_TRANSACTION", "INITIATOR", "TRANS_TYPE",
-    "AMOUNT", "DEBTOR", "CREDITOR", "DETAILS1", "DETAILS2",
-]
-
-LABELS = {
-    "DATE_TRANS": "Date / Heure",
-    "N_TRANSACTION": "N° Transaction",
-    "INITIATOR": "Initiateur",
-    "TRANS_TYPE": "Type",
-    "AMOUNT": "Montant",
-    "DEBTOR": "Débiteur",
-    "CREDITOR": "Créditeur",
-    "DETAILS1": "Détails 1",
-    "DETAILS2": "Détails 2",
-}
-
-AMOUNT_COLS = {"AMOUNT"}
 WATERMARK_LOGO = os.getenv("WATERMARK_LOGO")
 
+# À incrémenter à chaque changement du rendu (invalide le cache PDF)
+PDF_STYLE_VERSION = 2
+
 # ── Formatters ─────────────────────────────────────────────────
 def _fmt_amount(val):
     try:
         return f"{float(val):,.0f} Ar".replace(",", " ")
     except:
-        return val
+        return str(val)
 
 def _fmt_date(val):
+    # datetime natif (pipeline) : pas d'aller-retour par le texte
+    if isinstance(val, datetime):
+        return val.strftime("%d/%m/%Y %H:%M")
     try:
         return datetime.fromisoformat(val.split(".")[0]).strftime("%d/%m/%Y %H:%M")
     except:
-        return val
+        return str(val)
 
-# ── Watermark (FIX) ────────────────────────────────────────────
-def _draw_watermark(canvas, doc):
+# Noms utilisés par `ReportDefinition.pdf_formatters`
+_FORMATTERS = {"date": _fmt_date, "amount": _fmt_amount}
+
+def _fmt_cell(fmt, val) -> str:
+    if val is None:
+        return ""
+    if fmt is not None:
+        return fmt(val)
+    return str(val)
+
+
+def _pdf_layout(report_type: str):
+    """
+    Colonnes, libellés, formatage et largeurs PDF du type de rapport ;
+    mise en page par défaut pour un type non enregistré (CSV externe).
+    """
+    try:
+        definition = get_report(report_type)
+    except ValueError:
+        return (
+            DEFAULT_PDF_COLUMNS, DEFAULT_PDF_LABELS,
+            DEFAULT_PDF_FORMATTERS, DEFAULT_PDF_WIDTHS,
+        )
+    return (
+        definition.pdf_columns, definition.pdf_labels,
+        definition.pdf_formatters, definition.pdf_widths,
+    )
+
+# ── Watermark ──────────────────────────────────────────────────
+_WATERMARK_FORM = "mvola_watermark"
+
+
+@lru_cache(maxsize=None)
+def _watermark_image():
+    """Logo décodé une seule fois par processus (None si non configuré)."""
     if WATERMARK_LOGO and Path(WATERMARK_LOGO).exists():
+        return ImageReader(WATERMARK_LOGO)
+    return None
+
+
+def _draw_watermark(canvas, doc):
+    logo = _watermark_image()
+    if logo is None:
+        return
+
+    # Form XObject dessiné une fois par document, référencé sur chaque page
+    if not canvas.hasForm(_WATERMARK_FORM):
         w, h = landscape(A4)
-        logo = ImageReader(WATERMARK_LOGO)
 
+        canvas.beginForm(_WATERMARK_FORM)
         canvas.saveState()
         canvas.setFillAlpha(0.08)
 
@@ -83,6 +139,9 @@ def _draw_watermark(canvas, doc):
         )
 
         canvas.restoreState()
+        canvas.endForm()
+
+    canvas.doForm(_WATERMARK_FORM)
 
 # ── Header/Footer ──────────────────────────────────────────────
 def _on_page(canvas, doc):
@@ -90,25 +149,7 @@ def _on_page(canvas, doc):
     w, h = landscape(A4)
 
     # ── FILIGRANE (EN PREMIER = derrière tout visuellement) ──
-    if WATERMARK_LOGO and Path(WATERMARK_LOGO).exists():
-        logo = ImageReader(WATERMARK_LOGO)
-
-        canvas.setFillAlpha(0.08)
-        canvas.translate(w / 2, h / 2)
-        canvas.rotate(45)
-
-        canvas.drawImage(
-            logo,
-            -120, -120,
-            width=240,
-            height=240,
-            preserveAspectRatio=True,
-            mask="auto"
-        )
-
-        canvas.rotate(-45)
-        canvas.translate(-w / 2, -h / 2)
-        canvas.setFillAlpha(1)
+    _draw_watermark(canvas, doc)
 
     # ── HEADER ─────────────────────────────
     canvas.setFillColor(MVOLA_GREEN)
@@ -136,41 +177,231 @@ def _on_page(canvas, doc):
     canvas.restoreState()
 
 # ── Table style ────────────────────────────────────────────────
-def _table_style(headers):
+def _table_style(right_cols=(), fast=False):
     style = [
         ("BACKGROUND", (0, 0), (-1, 0), MVOLA_GREEN),
         ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
         ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
         ("FONTSIZE", (0, 0), (-1, 0), 7),
         ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+        # Alternance reprise en haut de chaque page, comme Table.split
         ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, MVOLA_GREY]),
         ("GRID", (0, 0), (-1, -1), 0.3, MVOLA_BORDER),
     ]
 
-    if "AMOUNT" in headers:
-        idx = headers.index("AMOUNT")
+    if fast:
+        # Cellules texte simples : police des Paragraph du mode standard
+        style += [
+            ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
+            ("FONTSIZE", (0, 1), (-1, -1), 7),
+            ("LEADING", (0, 0), (-1, -1), FAST_LEADING),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ]
+
+    # Montants alignés à droite
+    for idx in right_cols:
         style.append(("ALIGN", (idx, 1), (idx, -1), "RIGHT"))
 
     return TableStyle(style)
 
+# ── Chunked table ──────────────────────────────────────────────
+FAST_LEADING = 8.4
+WRAP_COLS = {"DETAILS1", "DETAILS2"}
+
+
+def table_chunk_rows() -> int:
+    """
+    Lignes mises en page à la fois (PDF_TABLE_CHUNK_ROWS, défaut 64) ; sans
+    effet sur le rendu, seulement sur le temps et la mémoire.
+    """
+    return int(os.getenv("PDF_TABLE_CHUNK_ROWS", 0)) or 64
+
+
+class _ChunkedTable(Flowable):
+    """
+    Table longue rendue par fenêtres de lignes.
+
+    ReportLab recalcule et recopie toute la table restante à chaque saut de
+    page ; ici seule une fenêtre de `chunk_rows` lignes est mise en page à la
+    fois (une `Table` avec l'en-tête répété). Les coupures de page sont
+    celles qu'aurait produites une table unique.
+
+    `rows` sont les lignes sources : `make_row` en construit les cellules
+    à la demande, fenêtre par fenêtre, au lieu de toutes les créer avant
+    la mise en page.
+    """
+
+    def __init__(
+        self, header, rows, make_row, col_widths, right_cols, chunk_rows,
+        fast=False, start=0, cells=None, heights=None,
+    ):
+        super().__init__()
+        self.header = header
+        self.rows = rows
+        self.make_row = make_row
+        self.col_widths = col_widths
+        self.right_cols = right_cols
+        self.chunk_rows = chunk_rows
+        self.fast = fast
+        self.start = start
+        self.hAlign = "CENTER"
+        self._table = None
+        # Cellules construites et hauteurs mesurées (index de ligne → valeur,
+        # -1 pour l'en-tête), partagées avec la suite de la table : le débord
+        # d'une fenêtre n'est ni reconstruit ni remesuré à la page suivante,
+        # comme Table.split transmet les hauteurs déjà calculées
+        self._cells = {} if cells is None else cells
+        self._heights = {} if heights is None else heights
+
+    def _window(self, size):
+        end = min(self.start + size, len(self.rows))
+        cells = self._cells
+        for i in range(self.start, end):
+            if i not in cells:
+                cells[i] = self.make_row(self.rows[i])
+
+        table = Table(
+            [self.header] + [cells[i] for i in range(self.start, end)],
+            colWidths=self.col_widths,
+            rowHeights=[self._heights.get(-1)]
+            + [self._heights.get(i) for i in range(self.start, end)],
+            repeatRows=1,
+        )
+        table.setStyle(_table_style(self.right_cols, fast=self.fast))
+        return table
+
+    def _measure(self, table, availWidth, availHeight):
+        size = table.wrap(availWidth, availHeight)
+        self._heights[-1] = table._rowHeights[0]
+        for i, height in enumerate(table._rowHeights[1:], self.start):
+            self._heights[i] = height
+        return size
+
+    def wrap(self, availWidth, availHeight):
+        remaining = len(self.rows) - self.start
+        if remaining > self.chunk_rows:
+            # Ne tient pas sur une page : forcer le découpage (split)
+            self._table = None
+            return availWidth, availHeight + 1
+        self._table = self._window(remaining)
+        return self._measure(self._table, availWidth, availHeight)
+
+    def split(self, availWidth, availHeight):
+        size = self.chunk_rows
+        while True:
+            table = self._window(size)
+            self._measure(table, availWidth, availHeight)
+            parts = table.split(availWidth, availHeight)
+            if not parts:
+                return []
+            consumed = len(parts[0]._cellvalues) - 1
+            if self.start + consumed >= len(self.rows):
+                return [parts[0]]
+            if len(parts) > 1:
+                # Lignes de cette page : tenues par parts[0] seulement
+                for i in range(self.start, self.start + consumed):
+                    del self._cells[i], self._heights[i]
+                rest = _ChunkedTable(
+                    self.header, self.rows, self.make_row, self.col_widths,
+                    self.right_cols, self.chunk_rows, fast=self.fast,
+                    start=self.start + consumed,
+                    cells=self._cells, heights=self._heights,
+                )
+                return [parts[0], rest]
+            # Fenêtre entièrement contenue dans la page : l'agrandir
+            size *= 2
+
+    def draw(self):
+        self._table.drawOn(self.canv, 0, 0)
+
+
+def _fast_row_builder(headers, indexes, formatters, col_widths):
+    """
+    Cellules en texte brut ; seules DETAILS1/DETAILS2 sont coupées en
+    lignes, à la largeur de leur colonne.
+    """
+    wrap_widths = {
+        pos: width - 12
+        for pos, (h, width) in enumerate(zip(headers, col_widths))
+        if h in WRAP_COLS
+    }
+
+    def make_row(r):
+        row_data = [_fmt_cell(fmt, r[i]) for fmt, i in zip(formatters, indexes)]
+        for pos, width in wrap_widths.items():
+            val = row_data[pos]
+            if val and stringWidth(val, "Helvetica", 7) > width:
+                row_data[pos] = "\n".join(simpleSplit(val, "Helvetica", 7, width))
+        return row_data
+
+    return make_row
+
+
+def _paragraph_row_builder(indexes, formatters, cell_style):
+    """Une Paragraph par cellule (mode standard)."""
+    def make_row(r):
+        return [
+            Paragraph(_fmt_cell(fmt, r[i]), cell_style)
+            for fmt, i in zip(formatters, indexes)
+        ]
+
+    return make_row
+
 # ── Generate PDF ───────────────────────────────────────────────
 def generate_pdf_for_day(
     day: str,
-    rows: list[dict],
+    rows: list[dict] | list[tuple],
     filename_prefix: str,
     report_type: str,
     output_dir: Path,
     account_number: str = "",
+    schema: ReportSchema | None = None,
+    fast_table: bool = False,
 ):
-    if not rows:
-        raise ValueError("Aucune donnée")
+    """
+    Génère le PDF d'une journée.
+
+    Avec `schema`, les lignes sont des tuples ordonnés selon ce schéma ;
+    sinon des dictionnaires.
 
+    La table est mise en page par fenêtres de PDF_TABLE_CHUNK_ROWS lignes
+    (voir `_ChunkedTable`). `fast_table` remplace les Paragraph par cellule
+    par du texte brut.
+    """
     output_dir.mkdir(parents=True, exist_ok=True)
 
     filepath = output_dir / f"{filename_prefix}_{day}.pdf"
 
+    _build_pdf(str(filepath), day, rows, report_type, account_number, schema, fast_table)
+
+    return filepath
+
+
+def render_pdf_for_day(
+    day: str,
+    rows: list[dict] | list[tuple],
+    report_type: str,
+    account_number: str = "",
+    schema: ReportSchema | None = None,
+    fast_table: bool = False,
+) -> bytes:
+    """Comme `generate_pdf_for_day`, mais retourne le PDF en mémoire."""
+    buffer = io.BytesIO()
+    _build_pdf(buffer, day, rows, report_type, account_number, schema, fast_table)
+    return buffer.getvalue()
+
+
+def _build_pdf(target, day, rows, report_type, account_number, schema, fast_table):
+    """Construit le PDF d'une journée dans `target` (chemin ou fichier binaire)."""
+    if not rows:
+        raise ValueError("Aucune donnée")
+
+    if schema is None:
+        schema = ReportSchema(rows[0].keys())
+        rows = [schema.to_row(r) for r in rows]
+
     doc = SimpleDocTemplate(
-        str(filepath),
+        target,
         pagesize=landscape(A4),
         leftMargin=15 * mm,
         rightMargin=15 * mm,
@@ -178,17 +409,18 @@ def generate_pdf_for_day(
         bottomMargin=15 * mm,
     )
 
-    headers = [h for h in SELECTED_COLS if h in rows[0]]
+    pdf_columns, labels, pdf_formatters, pdf_widths = _pdf_layout(report_type)
+
+    headers = [h for h in pdf_columns if h in schema]
+    indexes = [schema.index[h] for h in headers]
+    formatters = [_FORMATTERS.get(pdf_formatters.get(h)) for h in headers]
+    right_cols = [pos for pos, fmt in enumerate(formatters) if fmt is _fmt_amount]
     page_width = landscape(A4)[0] - 30 * mm
 
-    col_widths = []
-    for h in headers:
-        if h == "DATE_TRANS":
-            col_widths.append(35 * mm)
-        elif h == "AMOUNT":
-            col_widths.append(25 * mm)
-        else:
-            col_widths.append(page_width / len(headers))
+    col_widths = [
+        pdf_widths[h] * mm if h in pdf_widths else page_width / len(headers)
+        for h in headers
+    ]
 
     cell_style = ParagraphStyle("cell", fontSize=7)
     hdr_style = ParagraphStyle("hdr", fontSize=7, textColor=colors.white)
@@ -203,23 +435,25 @@ def generate_pdf_for_day(
     elements.append(Spacer(1, 5 * mm))
 
     # ── TABLE ───────────────────────────────
-    data = [[Paragraph(LABELS.get(h, h), hdr_style) for h in headers]]
-
-    for r in rows:
-        row_data = []
-        for h in headers:
-            val = str(r.get(h, ""))
-            if h == "DATE_TRANS":
-                val = _fmt_date(val)
-            elif h in AMOUNT_COLS:
-                val = _fmt_amount(val)
-            row_data.append(Paragraph(val, cell_style))
-        data.append(row_data)
-
-    table = Table(data, colWidths=col_widths, repeatRows=1)
-    table.setStyle(_table_style(headers))
-
-    elements.append(table)
+    # Fenêtres de lignes dans les deux modes : mémoire bornée par la
+    # fenêtre, même pour les journées de plusieurs dizaines de milliers
+    # de lignes
+    if fast_table:
+        header = [labels.get(h, h) for h in headers]
+        make_row = _fast_row_builder(headers, indexes, formatters, col_widths)
+    else:
+        header = [Paragraph(labels.get(h, h), hdr_style) for h in headers]
+        make_row = _paragraph_row_builder(indexes, formatters, cell_style)
+
+    elements.append(_ChunkedTable(
+        header=header,
+        rows=rows,
+        make_row=make_row,
+        col_widths=col_widths,
+        right_cols=right_cols,
+        chunk_rows=table_chunk_rows(),
+        fast=fast_table,
+    ))
 
     doc.build(
         elements,
@@ -227,7 +461,272 @@ def generate_pdf_for_day(
         onLaterPages=_on_page,
     )
 
-    return filepath
+# ── Days → PDFs + ZIP ──────────────────────────────────────────
+
+def day_key(val) -> str:
+    """Clé de regroupement par jour (YYYY-MM-DD), valeur native ou texte."""
+    if isinstance(val, datetime):
+        return val.strftime("%Y-%m-%d")
+    return str(val)[:10]
+
+
+def _render_day(task: dict) -> tuple[bytes, float, bool]:
+    """
+    Rend un jour en mémoire et mesure sa durée (exécuté dans un processus
+    du pool). `task["target"]` : fichier PDF à conserver, ou None.
+
+    Avec PDF_CACHE_DIR, un jour déjà rendu à l'identique (mêmes lignes,
+    même type, même compte, même style) est repris du cache au lieu d'être
+    rendu ; le booléen retourné l'indique.
+    """
+    start = time.perf_counter()
+
+    render_args = {k: v for k, v in task.items() if k != "target"}
+    target = task["target"]
+    if target is not None:
+        # Jamais d'écriture dans un fichier lié au cache (même inode)
+        target.unlink(missing_ok=True)
+
+    cache_dir = pdf_cache_dir()
+    key = None
+
+    if cache_dir is not None:
+        key = pdf_cache_key(
+            task["rows"],
+            PDF_STYLE_VERSION,
+            task["report_type"],
+            task["account_number"],
+            task["day"],
+            task["fast_table"],
+            task["schema"].columns,
+            _pdf_layout(task["report_type"]),
+            WATERMARK_LOGO,
+        )
+        data = read_cached_pdf(cache_dir, key)
+        if data is not None:
+            if target is not None:
+                link_cached_pdf(cache_dir, key, target)
+            return data, time.perf_counter() - start, True
+
+    data = render_pdf_for_day(**render_args)
+
+    if target is not None:
+        target.write_bytes(data)
+    if key is not None:
+        store_pdf(cache_dir, key, data)
+
+    return data, time.perf_counter() - start, False
+
+
+def _zip_compression(mode: str | None = None) -> int:
+    """
+    Compression des PDFs dans le ZIP : PDF_ZIP_COMPRESSION = stored (défaut,
+    les flux PDF sont déjà compressés) ou deflated.
+    """
+    mode = (mode or os.getenv("PDF_ZIP_COMPRESSION", "stored")).lower()
+    modes = {"stored": zipfile.ZIP_STORED, "deflated": zipfile.ZIP_DEFLATED}
+    if mode not in modes:
+        raise ValueError(f"PDF_ZIP_COMPRESSION invalide: {mode} (attendu: stored, deflated)")
+    return modes[mode]
+
+
+def default_pdf_workers() -> int:
+    """Processus de rendu PDF par défaut : PDF_WORKERS, sinon nombre de CPU."""
+    return int(os.getenv("PDF_WORKERS", 0)) or os.cpu_count() or 1
+
+
+class DailyPdfZip:
+    """
+    ZIP des PDFs journaliers, alimenté jour par jour (`add_day`).
+
+    Chaque jour est soumis au rendu dès qu'il est complet : dans `executor`
+    (ProcessPoolExecutor partagé par les jobs) s'il est fourni, sinon dans
+    un pool de `workers` processus (défaut PDF_WORKERS ou nombre de CPU ;
+    1 = rendu séquentiel ici). Au plus 2 rendus par processus restent en
+    attente : la mémoire est bornée par quelques jours de lignes.
+
+    Les PDFs sont écrits dans le ZIP dès leur rendu, sans fichier
+    intermédiaire ; le répertoire du ZIP est trié par jour à la fermeture :
+    jours dans l'ordre croissant quel que soit l'ordre des lignes (rapports
+    décroissants compris). `keep_files` (défaut PDF_KEEP_FILES) conserve
+    aussi les PDFs journaliers à côté du ZIP. `compression` : voir
+    `_zip_compression`. `metrics` (`utils.metrics.JobMetrics`) : durée de
+    rendu de chaque jour ("pdf_day") et d'écriture du ZIP ("zip").
+
+        with DailyPdfZip(...) as pdf_zip:
+            pdf_zip.add_day(day, rows)
+        zip_path = pdf_zip.zip_path
+    """
+
+    def __init__(
+        self,
+        filename_prefix: str,
+        report_type: str,
+        schema: ReportSchema,
+        output_base_dir: str = "outputs",
+        account_number: str = "",
+        executor=None,
+        workers: int | None = None,
+        fast_table: bool = False,
+        keep_files: bool | None = None,
+        compression: str | None = None,
+        metrics: JobMetrics | None = None,
+    ):
+        self.filename_prefix = filename_prefix
+        self.report_type = report_type
+        self.schema = schema
+        self.account_number = account_number
+        self.fast_table = fast_table
+        self.metrics = metrics
+
+        self.output_dir = Path(output_base_dir) / report_type
+        self.zip_path = self.output_dir / f"{filename_prefix}.zip"
+        self._tmp_path = self.zip_path.with_name(f".{self.zip_path.name}.tmp")
+
+        if keep_files is None:
+            keep_files = os.getenv("PDF_KEEP_FILES", "0").lower() in ("1", "true", "yes")
+        self.keep_files = keep_files
+        self._compress_type = _zip_compression(compression)
+
+        workers = workers or default_pdf_workers()
+        self._own_executor = None
+        if executor is None and workers > 1:
+            self._own_executor = executor = ProcessPoolExecutor(max_workers=workers)
+        self._executor = executor
+        self._max_pending = 2 * (workers if self._own_executor else default_pdf_workers())
+
+        # (jour, nombre de lignes, future ou résultat du rendu)
+        self._pending: deque = deque()
+        self._days: set[str] = set()
+        self._zip = None
+        self.cached = 0
+        self.zip_s = 0.0
+
+    def __enter__(self) -> "DailyPdfZip":
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._zip = zipfile.ZipFile(self._tmp_path, "w", self._compress_type)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._close()
+        finally:
+            if self._zip is not None:
+                self._zip.close()
+            self._tmp_path.unlink(missing_ok=True)
+            if self._own_executor is not None:
+                self._own_executor.shutdown(cancel_futures=True)
+
+    def add_day(self, day: str, rows: list):
+        """Soumet le rendu d'un jour complet (un jour ne peut être soumis qu'une fois)."""
+        if day in self._days:
+            raise ValueError(f"Jour {day} déjà rendu : lignes non ordonnées par date")
+        self._days.add(day)
+
+        task = dict(
+            day=day,
+            rows=rows,
+            report_type=self.report_type,
+            account_number=self.account_number,
+            schema=self.schema,
+            fast_table=self.fast_table,
+            target=(
+                self.output_dir / f"{self.filename_prefix}_{day}.pdf"
+                if self.keep_files else None
+            ),
+        )
+
+        if self._executor is not None:
+            self._pending.append((day, len(rows), self._executor.submit(_render_day, task)))
+            while len(self._pending) >= self._max_pending:
+                self._write_next()
+        else:
+            self._pending.append((day, len(rows), _render_day(task)))
+            self._write_next()
+
+    def _write_next(self):
+        day, row_count, rendered = self._pending.popleft()
+        data, elapsed, hit = rendered.result() if self._executor is not None else rendered
+
+        logger = logging.getLogger("send_report")
+        logger.info(
+            f"PDF {day} : {row_count} lignes en {elapsed:.2f}s"
+            + (" (cache)" if hit else "")
+        )
+        start = time.perf_counter()
+        self._zip.writestr(f"{self.filename_prefix}_{day}.pdf", data)
+        self.zip_s += time.perf_counter() - start
+        self.cached += hit
+
+        if self.metrics is not None:
+            self.metrics.add(
+                "pdf_day", elapsed,
+                day=str(day), rows=row_count, bytes=len(data), cached=int(hit),
+            )
+
+    def _close(self):
+        while self._pending:
+            self._write_next()
+
+        start = time.perf_counter()
+        # Entrées listées par jour croissant (noms <prefix>_AAAA-MM-JJ.pdf),
+        # sans garder en mémoire les PDFs des rapports lus en ordre décroissant
+        self._zip.filelist.sort(key=lambda info: info.filename)
+        self._zip.close()
+        self._zip = None
+        os.replace(self._tmp_path, self.zip_path)
+        self.zip_s += time.perf_counter() - start
+
+        if self.metrics is not None:
+            self.metrics.add("zip", self.zip_s, bytes=self.zip_path.stat().st_size)
+
+        logger = logging.getLogger("send_report")
+        if self.cached:
+            logger.info(f"{self.cached}/{len(self._days)} PDF(s) repris du cache")
+        logger.info(f"ZIP généré : {self.zip_path} ({len(self._days)} jour(s))")
+
+
+def generate_pdfs_by_day(
+        grouped: dict,
+        filename_prefix: str,
+        report_type: str,
+        schema: ReportSchema,
+        output_base_dir: str = "outputs",
+        account_number: str = "",
+        executor=None,
+        workers: int | None = None,
+        fast_table: bool = False,
+        keep_files: bool | None = None,
+        compression: str | None = None,
+        metrics: JobMetrics | None = None,
+    ):
+    """
+    Génère un PDF par jour (`grouped` : jour → lignes) directement dans un
+    ZIP, jours dans l'ordre croissant. Paramètres : voir `DailyPdfZip`.
+    Noms de fichiers et ordre du ZIP ne dépendent pas du parallélisme.
+    """
+    logger = logging.getLogger("send_report")
+    logger.info(f"{len(grouped)} jour(s) détecté(s)")
+
+    with DailyPdfZip(
+        filename_prefix=filename_prefix,
+        report_type=report_type,
+        schema=schema,
+        output_base_dir=output_base_dir,
+        account_number=account_number,
+        executor=executor,
+        workers=min(workers or default_pdf_workers(), len(grouped)),
+        fast_table=fast_table,
+        keep_files=keep_files,
+        compression=compression,
+        metrics=metrics,
+    ) as pdf_zip:
+        for day in sorted(grouped):
+            pdf_zip.add_day(day, grouped[day])
+
+    return pdf_zip.zip_path
+
 
 # ── CSV → PDFs + ZIP ───────────────────────────────────────────
 
@@ -239,13 +738,26 @@ def generate_pdfs_from_csv(
         account_number: str = "",
         date_col: str = "DATE_TRANS",
         csv_delimiter: str = ";",
+        executor=None,
+        workers: int | None = None,
+        fast_table: bool = False,
     ):
+        """
+        Génère un PDF par jour à partir d'un CSV (usage ponctuel), puis un ZIP.
+
+        Voir `generate_pdfs_by_day` pour `executor` / `workers` / `fast_table`.
+
+        Les jobs passent par `export.pipeline.export_report`, qui évite
+        de relire le CSV.
+        """
         logger = logging.getLogger("send_report")
         logging.basicConfig(level=logging.INFO)
 
         # ── Read CSV ───────────────────────────
         with open(csv_path, encoding="utf-8") as f:
-            data = list(csv.DictReader(f, delimiter=csv_delimiter))
+            reader = csv.reader(f, delimiter=csv_delimiter)
+            schema = ReportSchema(next(reader, ()))
+            data = list(reader)
 
         if not data:
             raise ValueError(f"CSV vide : {csv_path}")
@@ -253,43 +765,26 @@ def generate_pdfs_from_csv(
         logger.info(f"{len(data)} lignes chargées")
 
         # ── Group by day ───────────────────────
+        date_idx = schema.index[date_col]
         grouped = defaultdict(list)
         for row in data:
-            grouped[row[date_col][:10]].append(row)
-
-        logger.info(f"{len(grouped)} jour(s) détecté(s)")
-
-        # ── Output dir ─────────────────────────
-        output_dir = Path(output_base_dir) / report_type
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        generated_pdfs = []
-
-        # ── Generate PDFs ──────────────────────
-        for day in sorted(grouped.keys()):
-            pdf_path = generate_pdf_for_day(
-                day=day,
-                rows=grouped[day],
-                filename_prefix=filename_prefix,
-                report_type=report_type,
-                output_dir=output_dir,
-                account_number=account_number,
-            )
-            generated_pdfs.append(pdf_path)
-
-        # ── ZIP ────────────────────────────────
-        zip_path = output_dir / f"{filename_prefix}.zip"
-
-        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as z:
-            for pdf in generated_pdfs:
-                z.write(pdf, pdf.name)
-
-        logger.info(f"ZIP généré : {zip_path}")
-
-        return zip_path
+            grouped[day_key(row[date_idx])].append(row)
+
+        return generate_pdfs_by_day(
+            grouped,
+            filename_prefix=filename_prefix,
+            report_type=report_type,
+            schema=schema,
+            output_base_dir=output_base_dir,
+            account_number=account_number,
+            executor=executor,
+            workers=workers,
+            fast_table=fast_table,
+        )
 
 
 # ── Run ────────────────────────────────────────────────────────
 if __name__ == "__main__":
+    evict_pdf_cache()
     zip_file = generate_pdfs_from_csv("input.csv")
     print(zip_file)
\ No newline at end of file
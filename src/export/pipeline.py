@@ -0,0 +1,97 @@
+import time
+import logging
+from pathlib import Path
+from typing import Iterable
+
+from db.schema import ReportSchema
+from export.csv_exporter import generate_csv_stream
+from export.pdf_exporter import DailyPdfZip, day_key
+from utils.metrics import JobMetrics
+
+
+def export_report(
+    rows: Iterable[tuple],
+    schema: ReportSchema,
+    csv_prefix: str,
+    pdf_prefix: str,
+    report_type: str,
+    account_number: str = "",
+    csv_output_base_dir: str = "outputs",
+    pdf_output_base_dir: str = "outputs/pdf",
+    date_col: str = "DATE_TRANS",
+    executor=None,
+    workers: int | None = None,
+    fast_table: bool = False,
+    metrics: JobMetrics | None = None,
+) -> tuple[Path, Path, int]:
+    """
+    Écrit le CSV et les PDFs journaliers (+ ZIP) en un seul passage sur les lignes.
+
+    Les lignes arrivent ordonnées par date (croissante ou décroissante selon
+    le rapport, comme les retourne Oracle) : chaque ligne est écrite dans le
+    CSV et rangée telle quelle (datetime / Decimal natifs) dans son jour, et
+    un jour est soumis au rendu PDF dès que le suivant commence. La mémoire
+    reste bornée par quelques jours de lignes et le rendu avance pendant la
+    lecture. Le CSV n'est ni relu ni re-parsé.
+
+    `metrics` : étapes "csv" (hors attente des lignes, déjà comptée dans
+    "fetch" si `rows` vient de `JobMetrics.track_rows`, et hors rendu PDF),
+    "pdf_day" et "zip".
+
+    Retourne (chemin CSV, chemin ZIP, nombre de lignes).
+    """
+    logger = logging.getLogger("send_report")
+
+    date_idx = schema.index[date_col]
+    # Temps passé à soumettre / attendre les rendus pendant le passage CSV
+    pdf_s = 0.0
+
+    def _dispatch(rows, pdf_zip):
+        nonlocal pdf_s
+        day, day_rows = None, []
+        for row in rows:
+            key = day_key(row[date_idx])
+            if key != day:
+                if day_rows:
+                    t0 = time.perf_counter()
+                    pdf_zip.add_day(day, day_rows)
+                    pdf_s += time.perf_counter() - t0
+                day, day_rows = key, []
+            day_rows.append(row)
+            yield row
+
+        if day_rows:
+            t0 = time.perf_counter()
+            pdf_zip.add_day(day, day_rows)
+            pdf_s += time.perf_counter() - t0
+
+    if metrics is not None:
+        start = time.perf_counter()
+        fetch_before = metrics.values["fetch_s"]
+
+    with DailyPdfZip(
+        filename_prefix=pdf_prefix,
+        report_type=report_type,
+        schema=schema,
+        output_base_dir=pdf_output_base_dir,
+        account_number=account_number,
+        executor=executor,
+        workers=workers,
+        fast_table=fast_table,
+        metrics=metrics,
+    ) as pdf_zip:
+        csv_file, row_count = generate_csv_stream(
+            _dispatch(rows, pdf_zip),
+            filename_prefix=csv_prefix,
+            report_type=report_type,
+            output_base_dir=csv_output_base_dir,
+            schema=schema,
+        )
+
+        if metrics is not None:
+            fetch_s = metrics.values["fetch_s"] - fetch_before
+            metrics.add("csv", time.perf_counter() - start - fetch_s - pdf_s, rows=row_count)
+
+    logger.debug(f"{row_count} lignes exportées")
+
+    return csv_file, pdf_zip.zip_path, row_count
@@ -1,8 +1,16 @@
 import sys
 import csv
 import os
+import time
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime, timedelta
+from itertools import chain
 from pathlib import Path
+from typing import Iterable
 
 from dotenv import load_dotenv
 
@@ -11,26 +19,54 @@ if getattr(sys, 'frozen', False):
     # On est dans un exe PyInstaller
     base_dir = os.path.dirname(sys.executable)
 else:
-    base_dir = os.path.dirname(os.path.abspath(_file_))
+    base_dir = os.path.dirname(os.path.abspath(__file__))
 
 load_dotenv(os.path.join(base_dir, ".env"))
 
 
-from export.csv_exporter import generate_csv
-from services.email_service import send_email_html
+from export.pipeline import export_report
+from export.pdf_cache import evict_pdf_cache
+from export.pdf_exporter import default_pdf_workers
+from services.email_service import preload_templates
+from services.mail_queue import MailQueue, OutboundEmail
 from utils.logger import setup_logger
-from db.oracle import fetch_reports
-from export.pdf_exporter import generate_pdfs_from_csv
+from utils.metrics import SUMMARY_COLUMNS, job_metrics, run_metrics
+from config.reports import get_report
+from db.cache import cache_usage, get_result_cache, result_cache
+from db.oracle import (
+    fetch_reports,
+    fetch_reports_bulk,
+    get_report_schema,
+    iter_reports,
+    oracle_pool,
+)
+from services.journal import (
+    STAGE_EMAILED,
+    STAGE_EMPTY,
+    STAGE_EXPORTED,
+    STAGE_QUEUED,
+    RunJournal,
+    get_run_journal,
+    job_key,
+    run_journal,
+)
+from services.planner import (
+    BulkFetch,
+    FetchGroup,
+    ReportJob,
+    plan_bulk,
+    plan_fetches,
+    slice_rows,
+)
 
 
 CSV_JOBS_FILE = "report_jobs.csv"
 DATE_FORMAT = "%Y-%m-%d"
+PDF_MODES = {"standard", "fast"}
 
-logger = setup_logger(
-    log_level=os.getenv("LOG_LEVEL", "INFO")
-)
-
-logger.info("Démarrage de l'application")
+# Journalisation configurée dans `main` : les processus de rendu PDF
+# (méthode spawn, exe Windows) réimportent ce module
+logger = logging.getLogger("send_report")
 
 
 def parse_emails(value: str | None) -> list[str]:
@@ -39,138 +75,529 @@ def parse_emails(value: str | None) -> list[str]:
     return [e.strip() for e in value.split("|") if e.strip()]
 
 
-def main():
+def parse_job(idx: int, job: dict) -> ReportJob:
+    """
+    Convertit une ligne de report_jobs.csv en ReportJob (dates, partition,
+    mode PDF) ; lève ValueError si la ligne est invalide.
+    """
+    # Dates
+    date_debut = datetime.strptime(
+        job["date_debut"].strip(), DATE_FORMAT
+    )
+
+    # 🔥 FIN À 23:59:59
+    date_fin = (
+        datetime.strptime(job["date_fin"].strip(), DATE_FORMAT)
+        + timedelta(days=1)
+        - timedelta(seconds=1)
+    )
+
+    partition = job.get("partition", "").strip() or None
+
+    # Type de rapport enregistré (config/reports.py ou REPORTS_FILE)
+    get_report(job["report_type"])
+
+    # Mode de rendu PDF : "fast" (texte brut) ou standard (Paragraph)
+    pdf_mode = (job.get("pdf_mode") or "").strip().lower() or "standard"
+    if pdf_mode not in PDF_MODES:
+        raise ValueError(f"pdf_mode inconnu : {pdf_mode}")
+
+    return ReportJob(
+        idx=idx,
+        row=job,
+        report_type=job["report_type"],
+        nd=job["nd"],
+        date_debut=date_debut,
+        date_fin=date_fin,
+        partition=partition,
+        pdf_mode=pdf_mode,
+    )
+
+
+def summary_row(job: dict, csv_file, zip_file) -> dict:
+    """Ligne du CSV récapitulatif d'un job."""
+    return {
+        "to_email": job["to_email"],
+        "csv_files": str(csv_file),
+        "pdf_files": str(zip_file),
+        "cc":job.get("cc"),
+        "bcc":job.get("bcc"),
+        "Object":job.get("subject")
+    }
+
+
+# Colonnes ajoutées au CSV récapitulatif quand le cache de résultats est actif
+CACHE_COLUMNS = ["cache_hits", "cache_misses"]
+
+
+def add_cache_usage(row: dict | None, usage: dict) -> dict | None:
+    """Jours servis depuis le cache / lus depuis Oracle pour la ligne d'un job."""
+    if row is not None and get_result_cache() is not None:
+        row["cache_hits"] = row.get("cache_hits", 0) + usage["hits"]
+        row["cache_misses"] = row.get("cache_misses", 0) + usage["misses"]
+    return row
+
+
+def enqueue_email(
+    report_job: ReportJob,
+    csv_file,
+    zip_file,
+    row_count: int,
+    mail_queue: MailQueue,
+):
+    """Met en file l'email du job (CSV et ZIP en pièces jointes)."""
+    job = report_job.row
+    key = job_key(report_job)
+
+    context = {
+        "nd": report_job.nd,
+        "report_type": report_job.report_type.upper(),
+        "date_debut": report_job.date_debut.strftime("%d/%m/%Y"),
+        "date_fin": report_job.date_fin.strftime("%d/%m/%Y"),
+        "count": row_count,
+    }
+
+    mail_queue.enqueue(OutboundEmail(
+        job_idx=report_job.idx,
+        to_email=parse_emails(job["to_email"]),
+        cc=parse_emails(job.get("cc")),
+        bcc=parse_emails(job.get("bcc")),
+        subject=job["subject"],
+        template_name=job["template_name"],
+        context=context,
+        attachments=[str(csv_file), str(zip_file)],
+        job_key=key,
+    ))
+
+    # Étape notée une fois le message dans le spool : un arrêt entre les deux
+    # laisse le job "exporté", renvoyé par --resume (message spoolé mis de
+    # côté). Envoi déjà abouti (étape "emailed") : rien à changer.
+    journal = get_run_journal()
+    if journal is not None:
+        journal.record_stage(key, STAGE_QUEUED, current=STAGE_EXPORTED)
+
+
+def record_sent(email: OutboundEmail):
+    """Rappel de la file d'envoi : job marqué envoyé dans le journal."""
+    journal = get_run_journal()
+    if journal is not None and email.job_key:
+        journal.record_stage(email.job_key, STAGE_EMAILED)
+
+
+def process_job(
+    report_job: ReportJob,
+    rows: Iterable[tuple],
+    pdf_executor=None,
+    mail_queue: MailQueue | None = None,
+) -> dict | None:
+    """
+    Traite un job (CSV, PDFs, ZIP) à partir de ses lignes et retourne sa
+    ligne de récapitulatif, ou None si le job n'a rien produit.
+
+    Les erreurs (y compris celles de la lecture Oracle, si `rows` est un
+    flux `iter_reports`) sont journalisées et isolées au job concerné.
+    """
+    idx = report_job.idx
+    job = report_job.row
+    journal = get_run_journal()
+    metrics = job_metrics(idx)
+    start = time.perf_counter()
+
+    try:
+        logger.info(f"[JOB {idx}] Début traitement")
+
+        subject = job["subject"]
+
+        report_type = report_job.report_type
+        nd = report_job.nd
+        date_debut = report_job.date_debut
+        date_fin = report_job.date_fin
+        partition = report_job.partition
+        pdf_mode = report_job.pdf_mode
+
+        logger.info(
+            f"[JOB {idx}] Paramètres: type={report_type}, nd={nd}, "
+            f"debut={date_debut}, fin={date_fin}, partition={partition}, "
+            f"pdf_mode={pdf_mode}"
+        )
+
+        rows = iter(rows) if metrics is None else metrics.track_rows(rows)
+        first_row = next(rows, None)
+        if first_row is None:
+            logger.warning(f"[JOB {idx}] Aucun résultat")
+            if journal is not None:
+                journal.record_empty(report_job)
+            return None
+
+        date_formatee_debut = date_debut.strftime("%Y%m%d")
+        date_formatee_fin = date_fin.strftime("%Y%m%d")
+
+        # CSV + PDFs journaliers + ZIP en un seul passage sur les lignes
+        csv_file, zip_file, row_count = export_report(
+            chain([first_row], rows),
+            schema=get_report_schema(report_type),
+            csv_prefix=f"report_{subject}_{nd}_{date_formatee_debut}_{date_formatee_fin}",
+            pdf_prefix=f"{report_type}_{nd}_{date_formatee_debut}_{date_formatee_fin}",
+            report_type=report_type,
+            account_number=nd,
+            pdf_output_base_dir=f"outputs/pdf/{nd}/",
+            # Parallélisme des jours porté par le pool partagé du run
+            executor=pdf_executor,
+            workers=1,
+            fast_table=pdf_mode == "fast",
+            metrics=metrics,
+        )
+
+        logger.info(f"[JOB {idx}] {row_count} lignes récupérées")
+
+        if journal is not None:
+            journal.record_export(report_job, csv_file, zip_file, row_count)
+
+        """
+            pdf_file = generate_pdf(
+                results,
+                filename_prefix=f"{report_type}_{nd}",
+                report_type=report_type,
+            )
+
+            logger.info(f"[JOB {idx}] Fichiers générés")
+ 
+        pdfs_file = generate_pdfs_from_csv(
+            csv_path=csv_file,
+            filename_prefix=f"{report_type}_{nd}",
+            report_type=report_type,
+            output_base_dir="outputs/pdf",
+            account_number=nd,
+        )
+
+        """
+
+        # Envoi (--send) : message mis en file et persisté, le job continue
+        if mail_queue is not None:
+            enqueue_email(report_job, csv_file, zip_file, row_count, mail_queue)
+
+        return summary_row(job, csv_file, zip_file)
+
+    except Exception as e:
+        logger.error(
+            f"[JOB {idx}] Erreur traitement : {e}",
+            exc_info=True,
+        )
+        return None
+
+    finally:
+        if metrics is not None:
+            metrics.add("job", time.perf_counter() - start)
+
+
+def record_shared_fetch(jobs: list[ReportJob], elapsed: float, rows: int):
+    """Durée d'une requête partagée, répartie à parts égales entre ses jobs."""
+    for report_job in jobs:
+        metrics = job_metrics(report_job.idx)
+        if metrics is not None:
+            metrics.add("shared_fetch", elapsed / len(jobs), rows=rows)
+
+
+def run_group(
+    group: FetchGroup,
+    pdf_executor=None,
+    mail_queue: MailQueue | None = None,
+    rows: list[tuple] | None = None,
+) -> list[tuple[int, dict | None]]:
+    """
+    Exécute une requête planifiée et les jobs qui en dépendent.
+
+    Un job seul lit ses lignes en flux ; un groupe lit la plage couvrant
+    tous ses jobs en une requête, puis découpe le résultat pour chacun.
+    `rows` : lignes déjà lues pour ce groupe (mode groupé), pas de requête.
+    """
+    if rows is not None:
+        date_idx = get_report_schema(group.report_type).index["DATE_TRANS"]
+        return [
+            (
+                report_job.idx,
+                process_job(
+                    report_job,
+                    slice_rows(rows, date_idx, report_job),
+                    pdf_executor,
+                    mail_queue,
+                ),
+            )
+            for report_job in group.jobs
+        ]
+
+    if len(group.jobs) == 1:
+        report_job = group.jobs[0]
+        # Lignes lues par lots depuis Oracle et écrites au fil de l'eau
+        rows = iter_reports(
+            report_type=report_job.report_type,
+            nd=report_job.nd,
+            date_debut=report_job.date_debut,
+            date_fin=report_job.date_fin,
+            partition=report_job.partition,
+        )
+        # Lignes (et jours du cache) consommées dans ce thread par le job
+        with cache_usage() as usage:
+            row = process_job(report_job, rows, pdf_executor, mail_queue)
+        return [(report_job.idx, add_cache_usage(row, usage))]
+
+    job_ids = ", ".join(str(j.idx) for j in group.jobs)
+    logger.info(
+        f"[JOBS {job_ids}] Requête partagée: type={group.report_type}, nd={group.nd}, "
+        f"debut={group.date_debut}, fin={group.date_fin}, partition={group.partition}"
+    )
+
+    try:
+        start = time.perf_counter()
+        with cache_usage() as usage:
+            rows = fetch_reports(
+                report_type=group.report_type,
+                nd=group.nd,
+                date_debut=group.date_debut,
+                date_fin=group.date_fin,
+                partition=group.partition,
+            )
+        record_shared_fetch(group.jobs, time.perf_counter() - start, len(rows))
+    except Exception as e:
+        for report_job in group.jobs:
+            logger.error(
+                f"[JOB {report_job.idx}] Erreur traitement : {e}",
+                exc_info=True,
+            )
+        return [(report_job.idx, None) for report_job in group.jobs]
+
+    # Jours de la requête partagée reportés sur chacun de ses jobs
+    return [
+        (idx, add_cache_usage(row, usage))
+        for idx, row in run_group(group, pdf_executor, mail_queue, rows=rows)
+    ]
+
+
+def run_bulk(
+    bulk: BulkFetch,
+    pdf_executor=None,
+    mail_queue: MailQueue | None = None,
+) -> list[tuple[int, dict | None]]:
+    """
+    Lit une fois la partition pour tous les comptes du BulkFetch, puis
+    traite les jobs de chaque compte avec ses propres lignes.
+    """
+    if len(bulk.groups) == 1:
+        return run_group(bulk.groups[0], pdf_executor, mail_queue)
+
+    jobs = [job for group in bulk.groups for job in group.jobs]
+    job_ids = ", ".join(str(j.idx) for j in jobs)
+    logger.info(
+        f"[JOBS {job_ids}] Requête groupée: type={bulk.report_type}, "
+        f"{len(bulk.groups)} compte(s), debut={bulk.date_debut}, "
+        f"fin={bulk.date_fin}, partition={bulk.partition}"
+    )
+
+    try:
+        start = time.perf_counter()
+        rows_by_nd = fetch_reports_bulk(
+            report_type=bulk.report_type,
+            nds=bulk.nds,
+            date_debut=bulk.date_debut,
+            date_fin=bulk.date_fin,
+            partition=bulk.partition,
+        )
+        record_shared_fetch(
+            jobs,
+            time.perf_counter() - start,
+            sum(len(rows) for rows in rows_by_nd.values()),
+        )
+    except Exception as e:
+        for report_job in jobs:
+            logger.error(
+                f"[JOB {report_job.idx}] Erreur traitement : {e}",
+                exc_info=True,
+            )
+        return [(report_job.idx, None) for report_job in jobs]
+
+    results = []
+    for group in bulk.groups:
+        results.extend(
+            run_group(group, pdf_executor, mail_queue, rows=rows_by_nd[group.nd])
+        )
+    return results
+
+
+def resume_jobs(
+    report_jobs: list[ReportJob],
+    journal: RunJournal,
+    mail_queue: MailQueue | None = None,
+) -> tuple[list[ReportJob], list[tuple[int, dict | None]]]:
+    """
+    Sépare les jobs restant à traiter de ceux déjà produits par le run
+    précédent (fichiers intacts), repris tels quels depuis le journal.
+
+    Un job exporté mais pas encore mis en file est envoyé si `mail_queue` ;
+    un job déjà en file est renvoyé par le spool de la file d'envoi (les
+    messages spoolés des jobs relancés sont mis de côté).
+    """
+    pending, resumed = [], []
+    queued = set()
+
+    for report_job in report_jobs:
+        entry = journal.completed(report_job)
+        if entry is None:
+            pending.append(report_job)
+            continue
+
+        if entry.stage == STAGE_EMPTY:
+            resumed.append((report_job.idx, None))
+            continue
+
+        logger.info(f"[JOB {report_job.idx}] Déjà traité ({entry.stage}), repris du journal")
+
+        if mail_queue is not None and entry.stage == STAGE_EXPORTED:
+            enqueue_email(report_job, entry.csv_file, entry.zip_file, entry.rows, mail_queue)
+        elif entry.stage == STAGE_QUEUED:
+            queued.add(job_key(report_job))
+
+        resumed.append(
+            (report_job.idx, summary_row(report_job.row, entry.csv_file, entry.zip_file))
+        )
+
+    if mail_queue is not None:
+        mail_queue.replay(queued)
+
+    logger.info(
+        f"Reprise : {len(resumed)} job(s) déjà traité(s), {len(pending)} à traiter"
+    )
+    return pending, resumed
+
+
+def main(
+    workers: int = 1,
+    pdf_workers: int | None = None,
+    bulk: bool = False,
+    send: bool = False,
+    resume: bool = False,
+):
+    setup_logger(log_level=os.getenv("LOG_LEVEL", "INFO"))
+    logger.info("Démarrage de l'application")
+
     csv_path = Path(CSV_JOBS_FILE)
-    summary_rows: list[dict] = []
 
     if not csv_path.exists():
         logger.error(f"Fichier jobs introuvable : {CSV_JOBS_FILE}")
         return
 
-    logger.info("=== Démarrage traitement des jobs ===")
-
     with open(csv_path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f, delimiter=",")
-
-        for idx, job in enumerate(reader, start=1):
-            try:
-                logger.info(f"[JOB {idx}] Début traitement")
-
-                to_email = parse_emails(job["to_email"])
-                cc = parse_emails(job.get("cc"))
-                bcc = parse_emails(job.get("bcc"))
-
-                subject = job["subject"]
-                template_name = job["template_name"]
-
-                report_type = job["report_type"]
-                nd = job["nd"]
-
-                # Dates
-                date_debut = datetime.strptime(
-                    job["date_debut"].strip(), DATE_FORMAT
-                )
-
-                # 🔥 FIN À 23:59:59
-                date_fin = (
-                    datetime.strptime(job["date_fin"].strip(), DATE_FORMAT)
-                    + timedelta(days=1)
-                    - timedelta(seconds=1)
-                )
-
-                partition = job.get("partition", "").strip() or None
-
-                logger.info(
-                    f"[JOB {idx}] Paramètres: type={report_type}, nd={nd}, "
-                    f"debut={date_debut}, fin={date_fin}, partition={partition}"
-                )
-
-                results = fetch_reports(
-                    report_type=report_type,
-                    nd=nd,
-                    date_debut=date_debut,
-                    date_fin=date_fin,
-                    partition=partition,
-                )
-
-                if not results:
-                    logger.warning(f"[JOB {idx}] Aucun résultat")
-                    continue
-
-                logger.info(f"[JOB {idx}] {len(results)} lignes récupérées")
-
-                date_formatee_debut = date_debut.strftime("%Y%m%d")
-                date_formatee_fin = date_fin.strftime("%Y%m%d")
-
-                csv_file = generate_csv(
-                    results,
-                    filename_prefix=f"report_{subject}_{nd}_{date_formatee_debut}_{date_formatee_fin}",
-                    report_type=report_type,
-                )
-
-                """
-                    pdf_file = generate_pdf(
-                        results,
-                        filename_prefix=f"{report_type}_{nd}",
-                        report_type=report_type,
-                    )
-
-                    logger.info(f"[JOB {idx}] Fichiers générés")
-                 
-                pdfs_file = generate_pdfs_from_csv(
-                    csv_path=csv_file,
-                    filename_prefix=f"{report_type}_{nd}",
-                    report_type=report_type,
-                    output_base_dir="outputs/pdf",
-                    account_number=nd,
-                )
-
-                """
-
-                zip_file = generate_pdfs_from_csv(
-                    csv_path=csv_file,
-                    filename_prefix=f"{report_type}_{nd}_{date_formatee_debut}_{date_formatee_fin}",
-                    report_type=report_type,
-                    output_base_dir = f"outputs/pdf/{nd}/",
-                    account_number=nd,
-                )
-
-                context = {
-                    "nd": nd,
-                    "report_type": report_type.upper(),
-                    "date_debut": date_debut.strftime("%d/%m/%Y"),
-                    "date_fin": date_fin.strftime("%d/%m/%Y"),
-                    "count": len(results),
-                } 
-
-                """
-                    send_email_html(
-                            to_email=to_email,
-                            cc=cc,
-                            bcc=bcc,
-                            subject=subject,
-                            template_name=template_name,
-                            context=context,
-                            attachments=[csv_file],
-                    )
-
-                    logger.info(f"[JOB {idx}] Email envoyé avec succès")
-                """
-                
-                summary_rows.append({
-                    "to_email": job["to_email"],
-                    "csv_files": str(csv_file),
-                    "pdf_files": str(zip_file),
-                    "cc":job.get("cc"),
-                    "bcc":job.get("bcc"),
-                    "Object":job.get("subject")
-                })
-
-            except Exception as e:
-                logger.error(
-                    f"[JOB {idx}] Erreur traitement : {e}",
-                    exc_info=True,
-                )
+        jobs = list(enumerate(csv.DictReader(f, delimiter=","), start=1))
+
+    # Templates compilés une fois ; erreurs signalées avant tout job
+    if send:
+        preload_templates(job.get("template_name") for _, job in jobs)
+
+    report_jobs = []
+    for idx, job in jobs:
+        try:
+            report_jobs.append(parse_job(idx, job))
+        except Exception as e:
+            logger.error(
+                f"[JOB {idx}] Erreur traitement : {e}",
+                exc_info=True,
+            )
+
+    # Un job garde sa connexion Oracle pendant tout son export (lecture en
+    # flux), ORACLE_PARTITION_WORKERS connexions s'il lit ses partitions en
+    # parallèle : au-delà du pool, les jobs en trop échoueraient à l'expiration
+    # d'ORACLE_POOL_TIMEOUT
+    pool_max = int(os.getenv("ORACLE_POOL_MAX", 4))
+    per_job = max(1, int(os.getenv("ORACLE_PARTITION_WORKERS", 1)))
+    max_workers = max(1, pool_max // per_job)
+    if workers > max_workers:
+        logger.warning(
+            f"workers={workers} ramené à {max_workers} : ORACLE_POOL_MAX={pool_max}, "
+            f"{per_job} connexion(s) Oracle par job pendant tout son export"
+        )
+        workers = max_workers
+
+    logger.info(
+        f"=== Démarrage traitement des jobs ({len(jobs)} job(s), "
+        f"workers={workers}, pdf_workers={pdf_workers or default_pdf_workers()}) ==="
+    )
+
+    # Cache PDF (PDF_CACHE_DIR) : éviction par âge / taille une fois par run
+    evict_pdf_cache()
+
+    # Rendu des PDFs journaliers dans un pool de processus partagé par les jobs
+    pdf_workers = pdf_workers or default_pdf_workers()
+    pdf_executor = (
+        ProcessPoolExecutor(max_workers=pdf_workers) if pdf_workers > 1 else None
+    )
+
+    try:
+        # Métriques, journal de run, un seul pool Oracle, un cache de
+        # résultats et une file d'envoi pour tout le run (statistiques
+        # journalisées à la fermeture ; la file attend l'envoi de tous les
+        # emails avant de rendre la main)
+        with (
+            run_metrics() as metrics,
+            run_journal(csv_path, resume=resume) as journal,
+            oracle_pool(),
+            result_cache() as cache,
+            (
+                MailQueue(on_sent=record_sent, resume=resume) if send else nullcontext()
+            ) as mail_queue,
+        ):
+            # --resume : jobs déjà produits par le run précédent écartés
+            resumed = []
+            if resume:
+                report_jobs, resumed = resume_jobs(report_jobs, journal, mail_queue)
+
+            # Une requête Oracle par (type, nd, partition) et plage de dates contiguë
+            groups = plan_fetches(report_jobs)
+
+            # Mode groupé : une lecture de partition pour tous les comptes d'une même plage
+            if bulk:
+                units, run_unit = plan_bulk(groups), run_bulk
+            else:
+                units, run_unit = groups, run_group
+
+            if workers <= 1:
+                results = [
+                    run_unit(unit, pdf_executor, mail_queue)
+                    for unit in units
+                ]
+            else:
+                # Requêtes / CSV dans des threads
+                with ThreadPoolExecutor(max_workers=workers) as job_executor:
+                    results = list(job_executor.map(
+                        lambda unit: run_unit(
+                            unit,
+                            pdf_executor=pdf_executor,
+                            mail_queue=mail_queue,
+                        ),
+                        units,
+                    ))
+
+            results.append(resumed)
+    finally:
+        if pdf_executor is not None:
+            pdf_executor.shutdown()
+
+    # Ordre des jobs du fichier d'entrée conservé
+    summary_rows = [
+        row for _, row in sorted(chain.from_iterable(results), key=lambda r: r[0])
+        if row
+    ]
+
+    fieldnames = ["to_email", "csv_files","pdf_files","cc","bcc","Object"]
+
+    # Cache de résultats actif : jours servis depuis le cache / lus depuis Oracle
+    if cache is not None:
+        fieldnames += CACHE_COLUMNS
+
+    # Métriques actives : durées / volumes par étape en colonnes supplémentaires
+    if metrics is not None:
+        fieldnames += SUMMARY_COLUMNS
+        for idx, row in chain.from_iterable(results):
+            if row and idx in metrics.jobs:
+                row.update(metrics.jobs[idx].summary())
 
     # === CSV RÉCAPITULATIF ===
     if summary_rows:
@@ -179,9 +606,7 @@ def main():
         summary_path.parent.mkdir(exist_ok=True)
 
         with open(summary_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(
-                f, fieldnames=["to_email", "csv_files","pdf_files","cc","bcc","Object"]
-            )
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
             writer.writeheader()
             writer.writerows(summary_rows)
 
@@ -192,5 +617,46 @@ def main():
     logger.info("=== Fin traitement des jobs ===")
 
 
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Génération et envoi des rapports")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Nombre de jobs traités en parallèle (1 = séquentiel)",
+    )
+    parser.add_argument(
+        "--pdf-workers",
+        type=int,
+        default=None,
+        help="Processus de rendu PDF (défaut PDF_WORKERS ou nombre de CPU, 1 = séquentiel)",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Une seule requête Oracle pour les comptes partageant type, partition et dates",
+    )
+    parser.add_argument(
+        "--send",
+        action="store_true",
+        help="Envoyer les rapports par email (file d'envoi persistée dans MAIL_SPOOL_DIR)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reprendre le run précédent : les jobs déjà produits ne sont pas retraités",
+    )
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    main()
+    # Requis pour ProcessPoolExecutor dans l'exe PyInstaller
+    multiprocessing.freeze_support()
+    args = parse_args()
+    main(
+        workers=args.workers,
+        pdf_workers=args.pdf_workers,
+        bulk=args.bulk,
+        send=args.send,
+        resume=args.resume,
+    )
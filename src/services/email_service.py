@@ -1,14 +1,20 @@
 import os
 import sys
+import time
 import smtplib
 import logging
+import threading
 from pathlib import Path
 from email.message import EmailMessage
 from email.utils import make_msgid
 from dotenv import load_dotenv
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 from datetime import datetime
-from typing import List
+from html import escape
+from typing import Iterable, List
+from urllib.parse import quote
+
+from services.mime_stream import StreamingMessage, send_streaming
 
 
 # ============================================================
@@ -33,6 +39,65 @@ BASE_PATH = get_base_path()
 TEMPLATE_DIR = BASE_PATH / "templates"
 
 
+# ============================================================
+# TEMPLATES (environnement compilé une fois par run)
+# ============================================================
+
+_template_env: Environment | None = None
+_template_errors: dict[str, Exception] = {}
+_template_lock = threading.Lock()
+
+
+def get_template_env() -> Environment:
+    """
+    Environnement Jinja2 partagé : les templates compilés restent en cache
+    mémoire pour tout le run, et en bytecode sur disque (TEMPLATE_CACHE_DIR,
+    défaut .cache/jinja) d'un run à l'autre.
+    """
+    global _template_env
+
+    with _template_lock:
+        if _template_env is None:
+            if not TEMPLATE_DIR.exists():
+                raise RuntimeError(f"Dossier templates introuvable : {TEMPLATE_DIR}")
+
+            cache_dir = Path(os.getenv("TEMPLATE_CACHE_DIR", ".cache/jinja"))
+            cache_dir.mkdir(parents=True, exist_ok=True)
+
+            _template_env = Environment(
+                loader=FileSystemLoader(str(TEMPLATE_DIR)),
+                autoescape=True,
+                bytecode_cache=FileSystemBytecodeCache(str(cache_dir)),
+                auto_reload=False,
+            )
+
+    return _template_env
+
+
+def preload_templates(template_names: Iterable[str | None]) -> dict[str, Exception]:
+    """
+    Compile les templates utilisés par les jobs avant leur exécution.
+
+    Chaque template introuvable ou invalide est journalisé une seule fois ;
+    les envois qui l'utilisent échouent ensuite sans nouvelle compilation.
+    Retourne les erreurs par nom de template.
+    """
+    env = get_template_env()
+
+    # Noms vides ou None (ligne CSV incomplète) ignorés
+    for name in sorted({n for n in template_names if n}):
+        if name in _template_errors:
+            continue
+        try:
+            env.get_template(name)
+            logger.debug(f"Template compilé : {name}")
+        except Exception as e:
+            _template_errors[name] = e
+            logger.error(f"Template inutilisable : {name} ({e})")
+
+    return dict(_template_errors)
+
+
 # ============================================================
 # VALIDATION HELPERS
 # ============================================================
@@ -45,10 +110,122 @@ def _normalize_emails(emails: str | List[str] | None) -> List[str]:
     return emails
 
 
+# ============================================================
+# SMTP SESSION (une connexion pour tout le run)
+# ============================================================
+
+def _smtp_settings() -> tuple[str, int, str]:
+    host = os.getenv("EMAIL_HOST")
+    port = int(os.getenv("EMAIL_PORT", 25))  # 25 = port SMTP sans auth
+    from_email = os.getenv("EMAIL_FROM")     # adresse expéditeur uniquement
+
+    if not all([host, port, from_email]):
+        raise RuntimeError("Configuration EMAIL_HOST, EMAIL_PORT, EMAIL_FROM incomplète (.env)")
+
+    return host, port, from_email
+
+
+class MailSession:
+    """
+    Session SMTP partagée par tous les emails d'un run.
+
+    La connexion est ouverte au premier envoi, réinitialisée par RSET entre
+    deux messages et rouverte automatiquement si le relais l'a coupée.
+    Utilisable depuis plusieurs threads (envois sérialisés).
+
+        with MailSession() as session:
+            send_email_html(..., session=session)
+    """
+
+    def __init__(self, host: str | None = None, port: int | None = None, timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sent = 0
+        self.reconnects = 0
+        self._server: smtplib.SMTP | None = None
+        self._started: float | None = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "MailSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _connect(self):
+        if self.host is None or self.port is None:
+            host, port, _ = _smtp_settings()
+            self.host = self.host or host
+            self.port = self.port or port
+
+        logger.debug(f"Connexion SMTP {self.host}:{self.port}")
+        # Pas de starttls() ni login() — SMTP relay interne
+        self._server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+
+    def _drop(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except smtplib.SMTPException:
+            self._server.close()
+        except OSError:
+            pass
+        self._server = None
+
+    def _transmit(self, msg, from_addr: str, to_addrs: List[str]):
+        if isinstance(msg, StreamingMessage):
+            send_streaming(self._server, msg, from_addr=from_addr, to_addrs=to_addrs)
+        else:
+            self._server.send_message(msg, from_addr=from_addr, to_addrs=to_addrs)
+
+    def send(self, msg: EmailMessage | StreamingMessage, from_addr: str, to_addrs: List[str]):
+        with self._lock:
+            if self._started is None:
+                self._started = time.perf_counter()
+
+            try:
+                if self._server is None:
+                    self._connect()
+                else:
+                    self._server.rset()
+                self._transmit(msg, from_addr, to_addrs)
+            except smtplib.SMTPServerDisconnected:
+                # Relais qui a fermé la connexion (timeout, limite de messages…)
+                logger.warning("Connexion SMTP perdue, reconnexion")
+                self._server = None
+                self.reconnects += 1
+                self._connect()
+                self._transmit(msg, from_addr, to_addrs)
+
+            self.sent += 1
+
+    def close(self):
+        with self._lock:
+            self._drop()
+
+            if self.sent:
+                elapsed = time.perf_counter() - self._started
+                rate = self.sent / elapsed if elapsed else float(self.sent)
+                logger.info(
+                    f"Session SMTP : {self.sent} email(s) en {elapsed:.1f}s "
+                    f"({rate:.2f} email/s, reconnexions={self.reconnects})"
+                )
+
+
 # ============================================================
 # MAIN EMAIL FUNCTION
 # ============================================================
 
+def _attachment_location(path: Path) -> str:
+    """Lien (ATTACHMENT_LINK_BASE/<nom>) ou chemin d'une PJ non envoyée."""
+    base = os.getenv("ATTACHMENT_LINK_BASE")
+    if base:
+        return f"{base.rstrip('/')}/{quote(path.name)}"
+    return str(path.resolve())
+
+
 def send_email_html(
     to_email: str | List[str],
     subject: str,
@@ -57,15 +234,17 @@ def send_email_html(
     cc: List[str] | None = None,
     bcc: List[str] | None = None,
     attachments: List[str | Path] | None = None,
+    session: MailSession | None = None,
 ) -> None:
+    """
+    Envoie un email HTML (template Jinja2) avec pièces jointes.
 
-    # ---------------- ENV ----------------
-    host = os.getenv("EMAIL_HOST")
-    port = int(os.getenv("EMAIL_PORT", 25))  # 25 = port SMTP sans auth
-    from_email = os.getenv("EMAIL_FROM")     # adresse expéditeur uniquement
+    Avec `session`, l'envoi réutilise la connexion SMTP du run ;
+    sinon une connexion dédiée est ouverte pour ce seul message.
+    """
 
-    if not all([host, port, from_email]):
-        raise RuntimeError("Configuration EMAIL_HOST, EMAIL_PORT, EMAIL_FROM incomplète (.env)")
+    # ---------------- ENV ----------------
+    _, _, from_email = _smtp_settings()
 
     # ---------------- RECIPIENTS ----------------
     to_list = _normalize_emails(to_email)
@@ -76,21 +255,54 @@ def send_email_html(
         raise ValueError("Aucun destinataire principal (To)")
 
     # ---------------- TEMPLATE ----------------
-    if not TEMPLATE_DIR.exists():
-        raise RuntimeError(f"Dossier templates introuvable : {TEMPLATE_DIR}")
-
-    env = Environment(
-        loader=FileSystemLoader(str(TEMPLATE_DIR)),
-        autoescape=True
-    )
+    if template_name in _template_errors:
+        # Déjà signalé au préchargement
+        raise RuntimeError(f"Template inutilisable : {template_name}") from _template_errors[template_name]
 
     try:
-        template = env.get_template(template_name)
+        template = get_template_env().get_template(template_name)
     except Exception as e:
         logger.error(f"Template introuvable : {template_name}")
         raise
 
     html_content = template.render(**context)
+    text_content = "Votre client email ne supporte pas le HTML."
+
+    # ---------------- ATTACHMENTS ----------------
+    # Au-delà de MAIL_ATTACHMENT_MAX_MB, la PJ est remplacée par une note
+    max_bytes = float(os.getenv("MAIL_ATTACHMENT_MAX_MB", 20)) * 1024 * 1024
+    attached_paths = []
+    skipped_notes = []
+
+    for file in attachments or []:
+        path = Path(file)
+        if not path.exists():
+            logger.warning(f"PJ introuvable ignorée : {path}")
+            continue
+
+        size = path.stat().st_size
+        if size > max_bytes:
+            location = _attachment_location(path)
+            logger.warning(
+                f"PJ trop volumineuse non envoyée ({size / 1024 / 1024:.1f} Mo) : {path}"
+            )
+            skipped_notes.append(
+                f"{path.name} ({size / 1024 / 1024:.1f} Mo) : {location}"
+            )
+            continue
+
+        attached_paths.append(path)
+
+    if skipped_notes:
+        note_html = (
+            "<p>Fichiers trop volumineux pour être joints, disponibles ici :</p><ul>"
+            + "".join(f"<li>{escape(note)}</li>" for note in skipped_notes)
+            + "</ul>"
+        )
+        # Note placée dans le corps du template s'il en a un
+        head, sep, tail = html_content.rpartition("</body>")
+        html_content = head + note_html + sep + tail if sep else html_content + note_html
+        text_content += "\n\nFichiers non joints :\n" + "\n".join(skipped_notes)
 
     # ---------------- MESSAGE ----------------
     msg = EmailMessage()
@@ -102,27 +314,12 @@ def send_email_html(
     if cc_list:
         msg["Cc"] = ", ".join(cc_list)
 
-    msg.set_content("Votre client email ne supporte pas le HTML.")
+    msg.set_content(text_content)
     msg.add_alternative(html_content, subtype="html")
 
-    # ---------------- ATTACHMENTS ----------------
-    attached_files = []
-
-    if attachments:
-        for file in attachments:
-            path = Path(file)
-            if not path.exists():
-                logger.warning(f"PJ introuvable ignorée : {path}")
-                continue
-
-            with open(path, "rb") as f:
-                msg.add_attachment(
-                    f.read(),
-                    maintype="application",
-                    subtype="octet-stream",
-                    filename=path.name,
-                )
-            attached_files.append(path.name)
+    # PJ lues et encodées par blocs pendant l'envoi
+    stream = StreamingMessage(msg, attached_paths)
+    attached_files = [path.name for path in attached_paths]
 
     # ---------------- SEND (sans authentification) ----------------
     recipients = to_list + cc_list + bcc_list
@@ -133,9 +330,11 @@ def send_email_html(
     )
 
     try:
-        with smtplib.SMTP(host, port, timeout=30) as server:
-            # Pas de starttls() ni login() — SMTP relay interne
-            server.send_message(msg, from_addr=from_email, to_addrs=recipients)
+        if session is not None:
+            session.send(stream, from_addr=from_email, to_addrs=recipients)
+        else:
+            with MailSession() as own_session:
+                own_session.send(stream, from_addr=from_email, to_addrs=recipients)
 
         logger.info("Email envoyé avec succès")
 
@@ -0,0 +1,187 @@
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from services.planner import ReportJob
+
+logger = logging.getLogger("send_report")
+
+
+# ============================================================
+# JOURNAL DE RUN (REPRISE APRÈS INTERRUPTION)
+# ============================================================
+
+# Étapes d'un job, dans l'ordre. CSV, PDFs et ZIP sont produits en un seul
+# passage sur les lignes (export.pipeline) : une seule étape "exported".
+STAGE_EMPTY = "empty"
+STAGE_EXPORTED = "exported"
+STAGE_QUEUED = "queued"
+STAGE_EMAILED = "emailed"
+
+
+@dataclass
+class JournalEntry:
+    stage: str
+    rows: int = 0
+    csv_file: str | None = None
+    csv_sha256: str | None = None
+    zip_file: str | None = None
+    zip_sha256: str | None = None
+
+
+def job_key(report_job: ReportJob) -> str:
+    """Identité d'un job : sa position et le contenu de sa ligne."""
+    # Champs en trop d'une ligne CSV rangés par DictReader sous la clé None,
+    # non triable avec les noms de colonnes
+    row = {k: v for k, v in report_job.row.items() if k is not None}
+    payload = json.dumps([report_job.idx, row], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path: str | Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RunJournal:
+    """
+    Étape atteinte par chaque job d'un run, avec chemins et empreintes
+    SHA-256 de ses fichiers, dans une base SQLite à côté de report_jobs.csv.
+
+    Sans reprise, le journal est vidé au démarrage du run ; avec reprise,
+    `completed` indique les jobs dont les fichiers sont toujours présents et
+    intacts, qui ne sont alors ni relus depuis Oracle ni régénérés.
+    """
+
+    def __init__(self, path: Path, resume: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_key TEXT PRIMARY KEY,
+                idx INTEGER NOT NULL,
+                stage TEXT NOT NULL,
+                rows INTEGER NOT NULL DEFAULT 0,
+                csv_file TEXT,
+                csv_sha256 TEXT,
+                zip_file TEXT,
+                zip_sha256 TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        if not resume:
+            self._conn.execute("DELETE FROM jobs")
+        self._conn.commit()
+
+    def completed(self, report_job: ReportJob) -> JournalEntry | None:
+        """
+        Entrée du job s'il n'est plus à produire, None sinon (jamais traité,
+        ou fichiers supprimés / modifiés depuis).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stage, rows, csv_file, csv_sha256, zip_file, zip_sha256 "
+                "FROM jobs WHERE job_key = ?",
+                (job_key(report_job),),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        entry = JournalEntry(*row)
+        if entry.stage == STAGE_EMPTY:
+            return entry
+
+        for path, expected in (
+            (entry.csv_file, entry.csv_sha256),
+            (entry.zip_file, entry.zip_sha256),
+        ):
+            if not Path(path).exists() or file_sha256(path) != expected:
+                logger.warning(
+                    f"[JOB {report_job.idx}] Fichier absent ou modifié depuis le "
+                    f"run précédent ({path}), job retraité"
+                )
+                return None
+
+        return entry
+
+    def _record(self, report_job: ReportJob, stage: str, **fields):
+        columns = {
+            "job_key": job_key(report_job),
+            "idx": report_job.idx,
+            "stage": stage,
+            "updated_at": time.time(),
+            **fields,
+        }
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                list(columns.values()),
+            )
+            self._conn.commit()
+
+    def record_empty(self, report_job: ReportJob):
+        self._record(report_job, STAGE_EMPTY)
+
+    def record_export(self, report_job: ReportJob, csv_file: Path, zip_file: Path, rows: int):
+        self._record(
+            report_job,
+            STAGE_EXPORTED,
+            rows=rows,
+            csv_file=str(csv_file),
+            csv_sha256=file_sha256(csv_file),
+            zip_file=str(zip_file),
+            zip_sha256=file_sha256(zip_file),
+        )
+
+    def record_stage(self, key: str, stage: str, current: str | None = None):
+        """
+        Avance un job déjà exporté (mise en file, envoi) ; avec `current`,
+        seulement s'il est encore à cette étape.
+        """
+        query = "UPDATE jobs SET stage = ?, updated_at = ? WHERE job_key = ?"
+        params = (stage, time.time(), key)
+        if current is not None:
+            query += " AND stage = ?"
+            params += (current,)
+
+        with self._lock:
+            self._conn.execute(query, params)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_journal: RunJournal | None = None
+
+
+@contextmanager
+def run_journal(jobs_file: Path, resume: bool = False):
+    """Journal du run (`<fichier jobs>.journal.sqlite3`), ouvert pour sa durée."""
+    global _journal
+
+    path = jobs_file.with_name(f"{jobs_file.stem}.journal.sqlite3")
+    _journal = RunJournal(path, resume=resume)
+    logger.info(f"Journal de run : {path} ({'reprise' if resume else 'nouveau run'})")
+    try:
+        yield _journal
+    finally:
+        _journal.close()
+        _journal = None
+
+
+def get_run_journal() -> RunJournal | None:
+    return _journal
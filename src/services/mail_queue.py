@@ -0,0 +1,345 @@
+import os
+import json
+import time
+import uuid
+import queue
+import random
+import smtplib
+import logging
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from services.email_service import MailSession, send_email_html
+from utils.metrics import job_metrics
+
+logger = logging.getLogger("send_report")
+
+
+# ============================================================
+# MESSAGE EN ATTENTE
+# ============================================================
+
+@dataclass
+class OutboundEmail:
+    """Email d'un job, prêt à envoyer ; sérialisé tel quel dans le spool."""
+
+    job_idx: int
+    to_email: list[str]
+    subject: str
+    template_name: str
+    context: dict
+    cc: list[str] = field(default_factory=list)
+    bcc: list[str] = field(default_factory=list)
+    attachments: list[str] = field(default_factory=list)
+    job_key: str = ""
+    attempts: int = 0
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+
+def _is_transient(error: Exception) -> bool:
+    """Erreur réseau / relais temporaire (4xx) : l'envoi sera retenté."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    # SMTPServerDisconnected, SMTPConnectError, timeouts… (sous-classes d'OSError)
+    return isinstance(error, OSError)
+
+
+class _RateLimiter:
+    """Au plus `rate` envois par seconde vers le relais (0 = illimité)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        time.sleep(max(0.0, slot - now))
+
+
+# ============================================================
+# FILE D'ENVOI
+# ============================================================
+
+class MailQueue:
+    """
+    File d'envoi des emails, découplée de la génération des rapports.
+
+    Les jobs déposent leurs messages (`enqueue`) et continuent ; des threads
+    d'envoi (MAIL_WORKERS, une connexion SMTP chacun) les expédient au
+    rythme autorisé par le relais (MAIL_RATE_PER_SECOND).
+
+    Chaque message est écrit dans le spool (MAIL_SPOOL_DIR) avant d'être mis
+    en file et n'en est retiré qu'une fois envoyé. Les messages d'un run
+    interrompu ne sont renvoyés qu'en reprise (`resume`, voir `replay`) ;
+    sinon leurs jobs sont relancés et ils sont mis de côté dans
+    `<spool>/failed/` pour ne pas partir deux fois. Les échecs temporaires sont
+    retentés avec un délai croissant (MAIL_RETRY_BACKOFF × 2^n, jusqu'à
+    MAIL_MAX_ATTEMPTS) ; les échecs définitifs sont déplacés dans
+    `<spool>/failed/`. `on_sent` est appelé (thread d'envoi) pour chaque
+    message accepté par le relais.
+
+        with MailQueue() as mail_queue:
+            mail_queue.enqueue(OutboundEmail(...))
+    """
+
+    def __init__(
+        self,
+        spool_dir: str | Path | None = None,
+        workers: int | None = None,
+        rate: float | None = None,
+        max_attempts: int | None = None,
+        backoff: float | None = None,
+        on_sent: Callable[[OutboundEmail], None] | None = None,
+        resume: bool = False,
+    ):
+        self.spool_dir = Path(spool_dir or os.getenv("MAIL_SPOOL_DIR", "outputs/mail_spool"))
+        self.failed_dir = self.spool_dir / "failed"
+        self.workers = workers or int(os.getenv("MAIL_WORKERS", 2))
+        self.max_attempts = max_attempts or int(os.getenv("MAIL_MAX_ATTEMPTS", 5))
+        self.backoff = backoff if backoff is not None else float(os.getenv("MAIL_RETRY_BACKOFF", 2))
+        self.on_sent = on_sent
+        self.resume = resume
+        self._limiter = _RateLimiter(
+            rate if rate is not None else float(os.getenv("MAIL_RATE_PER_SECOND", 0))
+        )
+
+        # (prêt à partir de, ordre d'arrivée, message)
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._seq = 0
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        # Messages laissés par le run interrompu, en attente de `replay`
+        self._leftovers: list[OutboundEmail] = []
+
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.recovered = 0
+        self.set_aside = 0
+
+    # ---------------- CYCLE DE VIE ----------------
+
+    def __enter__(self) -> "MailQueue":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start(self):
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.failed_dir.mkdir(exist_ok=True)
+
+        # Messages laissés par un run interrompu
+        for path in sorted(self.spool_dir.glob("*.json")):
+            if not self.resume:
+                self._set_aside(path)
+                continue
+            try:
+                email = OutboundEmail(**json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError, TypeError) as e:
+                logger.error(f"Spool email illisible ignoré : {path} ({e})")
+                continue
+            self._leftovers.append(email)
+
+        if self.set_aside:
+            logger.warning(
+                f"{self.set_aside} email(s) d'un run interrompu déplacé(s) dans "
+                f"{self.failed_dir} sans être envoyé(s) : leurs jobs sont relancés "
+                f"(--resume pour les renvoyer)"
+            )
+
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"mail-sender-{i + 1}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def replay(self, job_keys: set[str]) -> int:
+        """
+        Reprise : remet en file les messages du run interrompu dont le job
+        (`job_key`) n'est pas relancé ; les autres sont mis de côté.
+        Retourne le nombre de messages repris.
+        """
+        leftovers, self._leftovers = self._leftovers, []
+        set_aside = self.set_aside
+        for email in leftovers:
+            if email.job_key and email.job_key in job_keys:
+                self._put(email)
+                self.recovered += 1
+            else:
+                self._set_aside(self.spool_dir / f"{email.id}.json")
+
+        if self.set_aside > set_aside:
+            logger.warning(
+                f"{self.set_aside - set_aside} email(s) du run interrompu déplacé(s) "
+                f"dans {self.failed_dir} : jobs relancés ou déjà envoyés"
+            )
+        if self.recovered:
+            logger.info(f"{self.recovered} email(s) en attente repris du spool")
+        return self.recovered
+
+    def _set_aside(self, path: Path):
+        try:
+            os.replace(path, self.failed_dir / path.name)
+            self.set_aside += 1
+        except OSError as e:
+            logger.error(f"Spool email non déplacé : {path} ({e})")
+
+    def close(self):
+        """
+        Attend l'envoi (ou l'échec définitif) de tous les messages, ou l'arrêt
+        de tous les threads d'envoi (messages restants laissés dans le spool).
+        """
+        with self._cond:
+            while self._pending:
+                if not any(thread.is_alive() for thread in self._threads):
+                    logger.error(
+                        f"File email : plus aucun thread d'envoi, {self._pending} "
+                        f"email(s) laissé(s) dans {self.spool_dir}"
+                    )
+                    break
+                self._cond.wait(timeout=1)
+
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+        logger.info(
+            f"File email : envoyés={self.sent}, échecs={self.failed}, "
+            f"nouvelles tentatives={self.retries}, repris du spool={self.recovered}, "
+            f"mis de côté={self.set_aside}"
+        )
+
+    # ---------------- DÉPÔT ----------------
+
+    def enqueue(self, email: OutboundEmail):
+        """Persiste le message dans le spool puis le met en file."""
+        self._persist(email)
+        self._put(email)
+        logger.info(f"[JOB {email.job_idx}] Email mis en file d'envoi")
+
+    def _put(self, email: OutboundEmail, ready_at: float = 0.0, new: bool = True):
+        with self._cond:
+            self._seq += 1
+            if new:
+                self._pending += 1
+            self._queue.put((ready_at, self._seq, email))
+
+    def _persist(self, email: OutboundEmail, directory: Path | None = None):
+        path = (directory or self.spool_dir) / f"{email.id}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(asdict(email), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _done(self, email: OutboundEmail, failed: bool = False):
+        spooled = self.spool_dir / f"{email.id}.json"
+        try:
+            if failed:
+                self._persist(email, self.failed_dir)
+            spooled.unlink(missing_ok=True)
+        except OSError as e:
+            logger.error(f"[JOB {email.job_idx}] Spool email non mis à jour : {e}")
+        finally:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+
+    # ---------------- ENVOI ----------------
+
+    def _worker(self):
+        # Une connexion SMTP par thread d'envoi
+        with MailSession() as session:
+            while not self._stop.is_set():
+                try:
+                    ready_at, seq, email = self._queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+                delay = ready_at - time.monotonic()
+                if delay > 0:
+                    # Pas encore l'heure de la nouvelle tentative
+                    self._queue.put((ready_at, seq, email))
+                    time.sleep(min(delay, 0.5))
+                    continue
+
+                try:
+                    self._send(session, email)
+                except Exception as e:
+                    # Erreur hors envoi SMTP : message abandonné, le thread continue
+                    logger.error(f"[JOB {email.job_idx}] Email abandonné sur erreur : {e}")
+                    self.failed += 1
+                    self._done(email, failed=True)
+
+    def _send(self, session: MailSession, email: OutboundEmail):
+        self._limiter.wait()
+        email.attempts += 1
+        metrics = job_metrics(email.job_idx)
+        start = time.perf_counter()
+
+        try:
+            send_email_html(
+                to_email=email.to_email,
+                cc=email.cc,
+                bcc=email.bcc,
+                subject=email.subject,
+                template_name=email.template_name,
+                context=email.context,
+                attachments=email.attachments,
+                session=session,
+            )
+        except Exception as e:
+            if metrics is not None:
+                metrics.add("send", time.perf_counter() - start, attempt=email.attempts, ok=0)
+
+            if _is_transient(e) and email.attempts < self.max_attempts:
+                delay = self.backoff * 2 ** (email.attempts - 1) * random.uniform(0.8, 1.2)
+                logger.warning(
+                    f"[JOB {email.job_idx}] Envoi email échoué "
+                    f"(tentative {email.attempts}/{self.max_attempts}), "
+                    f"nouvel essai dans {delay:.1f}s : {e}"
+                )
+                self.retries += 1
+                try:
+                    # Nombre de tentatives conservé pour une reprise
+                    self._persist(email)
+                except OSError as persist_error:
+                    logger.warning(
+                        f"[JOB {email.job_idx}] Spool email non mis à jour : {persist_error}"
+                    )
+                self._put(email, ready_at=time.monotonic() + delay, new=False)
+                return
+
+            logger.error(
+                f"[JOB {email.job_idx}] Envoi email abandonné après "
+                f"{email.attempts} tentative(s) : {e}"
+            )
+            self.failed += 1
+            self._done(email, failed=True)
+            return
+
+        if metrics is not None:
+            metrics.add("send", time.perf_counter() - start, attempt=email.attempts, ok=1)
+
+        logger.info(f"[JOB {email.job_idx}] Email envoyé avec succès")
+        self.sent += 1
+        self._done(email)
+        if self.on_sent is not None:
+            try:
+                self.on_sent(email)
+            except Exception as e:
+                logger.error(f"[JOB {email.job_idx}] Suivi de l'envoi en échec : {e}")
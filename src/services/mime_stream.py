@@ -0,0 +1,129 @@
+import uuid
+import base64
+import smtplib
+import logging
+from pathlib import Path
+from email.message import EmailMessage
+from email.policy import SMTP
+from typing import Iterator, List
+
+logger = logging.getLogger("send_report")
+
+
+# ============================================================
+# MESSAGE AVEC PIÈCES JOINTES EN FLUX
+# ============================================================
+
+# 57 octets → une ligne base64 de 76 caractères ; blocs de ~75 Ko lus du disque
+_LINE_BYTES = 57
+_BLOCK_LINES = 1024
+
+
+class StreamingMessage:
+    """
+    Email dont les pièces jointes sont lues et encodées en base64 par blocs
+    pendant l'envoi, au lieu d'être chargées entières en mémoire.
+
+    Chaque pièce jointe est déclarée dans `msg` avec un contenu provisoire
+    unique ; à l'envoi, ce contenu est remplacé dans le flux par le fichier
+    encodé au fil de la lecture.
+    """
+
+    def __init__(self, msg: EmailMessage, attachments: List[Path]):
+        self.msg = msg
+        self.attachments = list(attachments)
+        self._placeholders = []
+
+        for i, path in enumerate(self.attachments):
+            token = f"{uuid.uuid4().hex}-{i}".encode("ascii")
+            msg.add_attachment(
+                token,
+                maintype="application",
+                subtype="octet-stream",
+                filename=path.name,
+            )
+            self._placeholders.append(base64.b64encode(token) + b"\r\n")
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """Message complet (fins de ligne CRLF), par blocs de lignes entières."""
+        rest = self.msg.as_bytes(policy=SMTP)
+
+        for placeholder, path in zip(self._placeholders, self.attachments):
+            head, rest = rest.split(placeholder, 1)
+            yield head
+            yield from _iter_base64(path)
+
+        yield rest if rest.endswith(b"\r\n") else rest + b"\r\n"
+
+
+def _iter_base64(path: Path) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(_LINE_BYTES * _BLOCK_LINES)
+            if not block:
+                break
+            encoded = base64.b64encode(block)
+            yield b"\r\n".join(
+                encoded[i:i + 76] for i in range(0, len(encoded), 76)
+            ) + b"\r\n"
+
+
+def _dot_stuff(chunk: bytes) -> bytes:
+    """Double les points en début de ligne (RFC 5321 §4.5.2)."""
+    if chunk.startswith(b"."):
+        chunk = b"." + chunk
+    return chunk.replace(b"\r\n.", b"\r\n..")
+
+
+# ============================================================
+# ENVOI SMTP (MAIL / RCPT / DATA)
+# ============================================================
+
+def send_streaming(
+    server: smtplib.SMTP,
+    message: StreamingMessage,
+    from_addr: str,
+    to_addrs: List[str],
+):
+    """
+    Équivalent de `server.send_message` écrivant le message par blocs sur
+    la connexion. Mêmes exceptions que `smtplib.SMTP.sendmail`.
+    """
+    server.ehlo_or_helo_if_needed()
+
+    code, resp = server.mail(from_addr)
+    if code != 250:
+        if code == 421:
+            server.close()
+        else:
+            server.rset()
+        raise smtplib.SMTPSenderRefused(code, resp, from_addr)
+
+    refused = {}
+    for addr in to_addrs:
+        code, resp = server.rcpt(addr)
+        if code not in (250, 251):
+            refused[addr] = (code, resp)
+        if code == 421:
+            server.close()
+            raise smtplib.SMTPRecipientsRefused(refused)
+
+    if len(refused) == len(to_addrs):
+        server.rset()
+        raise smtplib.SMTPRecipientsRefused(refused)
+
+    if refused:
+        logger.warning(f"Destinataires refusés : {list(refused)}")
+
+    server.putcmd("data")
+    code, resp = server.getreply()
+    if code != 354:
+        raise smtplib.SMTPDataError(code, resp)
+
+    for chunk in message.iter_chunks():
+        server.send(_dot_stuff(chunk))
+
+    server.send(b".\r\n")
+    code, resp = server.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, resp)
@@ -0,0 +1,150 @@
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+logger = logging.getLogger("send_report")
+
+
+# ============================================================
+# JOBS & GROUPES DE REQUÊTES
+# ============================================================
+
+@dataclass
+class ReportJob:
+    """Une ligne de report_jobs.csv, paramètres déjà convertis."""
+
+    idx: int
+    row: dict
+    report_type: str
+    nd: str
+    date_debut: datetime
+    date_fin: datetime
+    partition: str | None = None
+    pdf_mode: str = "standard"
+
+
+@dataclass
+class FetchGroup:
+    """
+    Une requête Oracle partagée par plusieurs jobs : même type de rapport,
+    même compte et même partition, plages de dates qui se chevauchent.
+    """
+
+    report_type: str
+    nd: str
+    partition: str | None
+    date_debut: datetime
+    date_fin: datetime
+    jobs: list[ReportJob] = field(default_factory=list)
+
+    def add(self, job: ReportJob):
+        self.jobs.append(job)
+        self.date_debut = min(self.date_debut, job.date_debut)
+        self.date_fin = max(self.date_fin, job.date_fin)
+
+
+@dataclass
+class BulkFetch:
+    """
+    Plusieurs groupes de comptes différents sur le même type de rapport, la
+    même partition et la même plage de dates : une seule lecture de la
+    partition (liste IN de comptes), redistribuée ensuite par compte.
+    """
+
+    report_type: str
+    partition: str | None
+    date_debut: datetime
+    date_fin: datetime
+    groups: list[FetchGroup] = field(default_factory=list)
+
+    @property
+    def nds(self) -> list[str]:
+        return [group.nd for group in self.groups]
+
+
+# ============================================================
+# PLANIFICATION
+# ============================================================
+
+def plan_fetches(jobs: list[ReportJob]) -> list[FetchGroup]:
+    """
+    Regroupe les jobs par (report_type, nd, partition) et fusionne les plages
+    de dates qui se chevauchent ou se touchent : une seule requête par groupe,
+    découpée ensuite en mémoire pour chaque job.
+
+    Des plages disjointes restent des requêtes séparées (pas de lecture des
+    jours intermédiaires dont aucun job n'a besoin).
+    """
+    by_key: dict[tuple, list[ReportJob]] = {}
+    for job in jobs:
+        key = (job.report_type.lower(), job.nd, job.partition)
+        by_key.setdefault(key, []).append(job)
+
+    groups: list[FetchGroup] = []
+
+    for (report_type, nd, partition), key_jobs in by_key.items():
+        current: FetchGroup | None = None
+
+        for job in sorted(key_jobs, key=lambda j: (j.date_debut, j.idx)):
+            contiguous = (
+                current is not None
+                and job.date_debut <= current.date_fin + timedelta(seconds=1)
+            )
+            if not contiguous:
+                current = FetchGroup(
+                    report_type=report_type,
+                    nd=nd,
+                    partition=partition,
+                    date_debut=job.date_debut,
+                    date_fin=job.date_fin,
+                )
+                groups.append(current)
+            current.add(job)
+
+    # Ordre d'exécution : celui du premier job de chaque groupe
+    groups.sort(key=lambda g: min(j.idx for j in g.jobs))
+
+    saved = len(jobs) - len(groups)
+    logger.info(
+        f"Planification : {len(jobs)} job(s) → {len(groups)} requête(s) Oracle "
+        f"({saved} aller(s)-retour(s) évité(s))"
+    )
+
+    return groups
+
+
+def slice_rows(rows: list[tuple], date_idx: int, job: ReportJob) -> list[tuple]:
+    """Lignes du groupe qui relèvent de la plage de dates du job."""
+    return [
+        row for row in rows
+        if job.date_debut <= row[date_idx] <= job.date_fin
+    ]
+
+
+def plan_bulk(groups: list[FetchGroup]) -> list[BulkFetch]:
+    """
+    Réunit les groupes de comptes différents qui partagent type de rapport,
+    partition et plage de dates exacte (cas typique : le même rapport
+    journalier envoyé à de nombreux comptes).
+
+    Un groupe sans équivalent reste seul dans son BulkFetch.
+    """
+    by_key: dict[tuple, BulkFetch] = {}
+    for group in groups:
+        key = (group.report_type, group.partition, group.date_debut, group.date_fin)
+        if key not in by_key:
+            by_key[key] = BulkFetch(
+                report_type=group.report_type,
+                partition=group.partition,
+                date_debut=group.date_debut,
+                date_fin=group.date_fin,
+            )
+        by_key[key].groups.append(group)
+
+    bulks = list(by_key.values())
+
+    logger.info(
+        f"Mode groupé : {len(groups)} requête(s) → {len(bulks)} lecture(s) de partition"
+    )
+
+    return bulks
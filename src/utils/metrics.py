@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator
+
+logger = logging.getLogger("send_report")
+
+
+# ============================================================
+# MÉTRIQUES PAR JOB ET PAR ÉTAPE
+# ============================================================
+
+# Colonnes ajoutées au CSV récapitulatif quand les métriques sont actives
+SUMMARY_COLUMNS = [
+    "rows", "bytes_fetched", "fetch_s", "csv_s", "pdf_s", "pdf_days",
+    "pdf_cached", "zip_s", "send_s", "total_s",
+]
+
+
+def _row_bytes(row: tuple) -> int:
+    """Taille estimée d'une ligne : longueur des textes, 8 octets sinon."""
+    return sum(
+        len(value) if isinstance(value, (str, bytes)) else 8
+        for value in row
+        if value is not None
+    )
+
+
+class JobMetrics:
+    """
+    Durées et volumes d'un job, étape par étape.
+
+    Chaque appel à `add` écrit un événement JSON (une ligne) et cumule
+    `<étape>_s`, `<étape>_count` et les champs numériques `<étape>_<champ>`.
+    """
+
+    def __init__(self, recorder: "MetricsRecorder", job_idx: int):
+        self.recorder = recorder
+        self.job_idx = job_idx
+        self.values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float, **fields):
+        with self._lock:
+            self.values[f"{stage}_s"] += seconds
+            self.values[f"{stage}_count"] += 1
+            for name, value in fields.items():
+                if isinstance(value, (int, float)):
+                    self.values[f"{stage}_{name}"] += value
+
+        self.recorder.emit({
+            "job": self.job_idx,
+            "stage": stage,
+            "seconds": round(seconds, 6),
+            **fields,
+        })
+
+    def track_rows(self, rows: Iterable[tuple]) -> Iterator[tuple]:
+        """
+        Relaie les lignes en mesurant l'attente de chacune (requête Oracle,
+        fetchmany) ; étape "fetch" (rows, bytes) enregistrée en fin de flux.
+        """
+        fetch_s = 0.0
+        count = 0
+        size = 0
+        rows = iter(rows)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    row = next(rows)
+                except StopIteration:
+                    break
+                finally:
+                    fetch_s += time.perf_counter() - start
+                count += 1
+                size += _row_bytes(row)
+                yield row
+        finally:
+            self.add("fetch", fetch_s, rows=count, bytes=size)
+
+    def summary(self) -> dict:
+        """Colonnes SUMMARY_COLUMNS du CSV récapitulatif."""
+        v = self.values
+        return {
+            "rows": int(v["fetch_rows"]),
+            "bytes_fetched": int(v["fetch_bytes"]),
+            # Attente des lignes + part des requêtes partagées (groupes, --bulk)
+            "fetch_s": round(v["fetch_s"] + v["shared_fetch_s"], 3),
+            "csv_s": round(v["csv_s"], 3),
+            "pdf_s": round(v["pdf_day_s"], 3),
+            "pdf_days": int(v["pdf_day_count"]),
+            "pdf_cached": int(v["pdf_day_cached"]),
+            "zip_s": round(v["zip_s"], 3),
+            "send_s": round(v["send_s"], 3),
+            "total_s": round(v["job_s"], 3),
+        }
+
+
+class MetricsRecorder:
+    """
+    Événements JSON lines (`jsonl_path`) et, en fin de run, fichier texte
+    Prometheus (`prometheus_path`, format node_exporter textfile).
+    """
+
+    def __init__(self, jsonl_path: Path | None = None, prometheus_path: Path | None = None):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.started = time.time()
+        self.jobs: dict[int, JobMetrics] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+        if jsonl_path is not None:
+            jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(jsonl_path, "a", encoding="utf-8")
+
+    def job(self, job_idx: int) -> JobMetrics:
+        with self._lock:
+            if job_idx not in self.jobs:
+                self.jobs[job_idx] = JobMetrics(self, job_idx)
+            return self.jobs[job_idx]
+
+    def emit(self, event: dict):
+        if self._file is None:
+            return
+        line = json.dumps(
+            {"ts": datetime.now().isoformat(timespec="milliseconds"), **event},
+            ensure_ascii=False,
+            default=str,
+        )
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def totals(self) -> dict:
+        totals = defaultdict(float)
+        with self._lock:
+            for metrics in self.jobs.values():
+                for name, value in metrics.values.items():
+                    totals[name] += value
+        return totals
+
+    def write_prometheus(self):
+        totals = self.totals()
+        stages = sorted(name[:-2] for name in totals if name.endswith("_s"))
+
+        lines = [
+            "# HELP send_report_stage_seconds Durée cumulée par étape (dernier run)",
+            "# TYPE send_report_stage_seconds gauge",
+            *(
+                f'send_report_stage_seconds{{stage="{stage}"}} {totals[f"{stage}_s"]:.6f}'
+                for stage in stages
+            ),
+            "# HELP send_report_jobs Jobs mesurés (dernier run)",
+            "# TYPE send_report_jobs gauge",
+            f"send_report_jobs {len(self.jobs)}",
+            "# HELP send_report_rows_fetched Lignes lues (dernier run)",
+            "# TYPE send_report_rows_fetched gauge",
+            f"send_report_rows_fetched {int(totals['fetch_rows'])}",
+            "# HELP send_report_bytes_fetched Octets lus, estimés (dernier run)",
+            "# TYPE send_report_bytes_fetched gauge",
+            f"send_report_bytes_fetched {int(totals['fetch_bytes'])}",
+            "# HELP send_report_pdf_days PDFs journaliers produits (dernier run)",
+            "# TYPE send_report_pdf_days gauge",
+            f"send_report_pdf_days {int(totals['pdf_day_count'])}",
+            "# HELP send_report_emails_sent Emails acceptés par le relais (dernier run)",
+            "# TYPE send_report_emails_sent gauge",
+            f"send_report_emails_sent {int(totals['send_ok'])}",
+            "# HELP send_report_run_seconds Durée du dernier run",
+            "# TYPE send_report_run_seconds gauge",
+            f"send_report_run_seconds {time.time() - self.started:.3f}",
+            "# HELP send_report_last_run_timestamp_seconds Fin du dernier run",
+            "# TYPE send_report_last_run_timestamp_seconds gauge",
+            f"send_report_last_run_timestamp_seconds {time.time():.0f}",
+        ]
+
+        # Écriture atomique : le collecteur ne lit jamais un fichier partiel
+        self.prometheus_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.prometheus_path.with_name(f".{self.prometheus_path.name}.tmp")
+        tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp, self.prometheus_path)
+
+    def close(self):
+        if self.prometheus_path is not None:
+            try:
+                self.write_prometheus()
+            except OSError as e:
+                logger.warning(f"Métriques Prometheus non écrites : {e}")
+
+        if self._file is not None:
+            with self._lock:
+                self._file.close()
+                self._file = None
+
+
+_recorder: MetricsRecorder | None = None
+
+
+@contextmanager
+def run_metrics():
+    """
+    Métriques du run si METRICS_DIR (événements JSON lines) ou
+    METRICS_PROMETHEUS_FILE (fichier texte Prometheus) est défini ;
+    sinon rien n'est mesuré et `job_metrics` retourne None.
+    """
+    global _recorder
+
+    metrics_dir = os.getenv("METRICS_DIR")
+    prometheus_file = os.getenv("METRICS_PROMETHEUS_FILE")
+
+    if not metrics_dir and not prometheus_file:
+        yield None
+        return
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    _recorder = MetricsRecorder(
+        jsonl_path=Path(metrics_dir) / f"metrics_{timestamp}.jsonl" if metrics_dir else None,
+        prometheus_path=Path(prometheus_file) if prometheus_file else None,
+    )
+    logger.info(f"Métriques activées : {_recorder.jsonl_path or _recorder.prometheus_path}")
+
+    recorder = _recorder
+    try:
+        yield recorder
+    finally:
+        recorder.close()
+        _recorder = None
+
+
+def job_metrics(job_idx: int) -> JobMetrics | None:
+    """Métriques du job, None si désactivées."""
+    if _recorder is None:
+        return None
+    return _recorder.job(job_idx)
@@ -0,0 +1,52 @@
+import sys
+import logging
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from db import oracle  # noqa: E402
+from db.partitions import partitions_from_bounds  # noqa: E402
+
+BOUNDS = (
+    ("P202601", datetime(2026, 2, 1)),
+    ("P202602", datetime(2026, 3, 1)),
+)
+
+
+def test_partitions_from_bounds_covering_range():
+    assert partitions_from_bounds(
+        BOUNDS, datetime(2026, 1, 20), datetime(2026, 2, 5, 23, 59, 59)
+    ) == ["P202601", "P202602"]
+
+
+def test_partitions_from_bounds_empty():
+    # Aucune borne lue, ou plage au-delà de la dernière partition
+    assert partitions_from_bounds((), datetime(2026, 1, 1), datetime(2026, 1, 31)) == []
+    assert partitions_from_bounds(BOUNDS, datetime(2026, 4, 1), datetime(2026, 4, 30)) == []
+
+
+def test_resolve_partitions_lookup_without_bounds_reads_whole_table(monkeypatch, caplog):
+    monkeypatch.setenv("ORACLE_PARTITIONS", "lookup")
+    monkeypatch.setattr(oracle, "_partition_bounds", lambda owner, table: ())
+
+    with caplog.at_level(logging.WARNING, logger="send_report"):
+        partitions = oracle.resolve_partitions(
+            "remit", None, datetime(2026, 1, 1), datetime(2026, 1, 31, 23, 59, 59)
+        )
+
+    assert partitions == [None]
+    assert "aucune partition trouvée" in caplog.text
+
+
+def test_resolve_partitions_lookup_range_outside_bounds(monkeypatch):
+    monkeypatch.setenv("ORACLE_PARTITIONS", "lookup")
+    monkeypatch.setattr(oracle, "_partition_bounds", lambda owner, table: BOUNDS)
+
+    assert oracle.resolve_partitions(
+        "up", None, datetime(2026, 4, 1), datetime(2026, 4, 30, 23, 59, 59)
+    ) == [None]
+    # Partitions trouvées : ordre du rapport (décroissant pour UP)
+    assert oracle.resolve_partitions(
+        "up", None, datetime(2026, 1, 20), datetime(2026, 2, 5, 23, 59, 59)
+    ) == ["P202602", "P202601"]